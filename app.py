@@ -6,10 +6,13 @@ Week 1: Foundation setup with template management
 """
 
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+import orjson
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, date
 import logging
+from itertools import chain
 
 # Configure logging
 logging.basicConfig(
@@ -18,7 +21,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson (serializes NumPy/pandas values natively)
+    Falls back to Flask's default() for types orjson doesn't know.
+
+    Dates are ISO 8601 throughout: orjson writes datetime/date that way,
+    and default() does the same for subclasses such as pd.Timestamp
+    rather than Flask's RFC 822 format.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime, date)):
+            return None if o != o else o.isoformat()  # NaT -> null
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Import configurations
 try:
@@ -128,7 +161,7 @@ def list_drive_folder(folder_type):
                 'available_types': list(config.DRIVE_FOLDERS.keys())
             }), 400
 
-        files = google_drive.list_files_in_folder(folder_id)
+        files = google_drive.list_files_full(folder_id)
 
         return jsonify({
             'folder_type': folder_type,
@@ -160,20 +193,11 @@ def read_excel_file(file_id):
         file_bytes = google_drive.download_file_as_bytes(file_id)
 
         # Read directly from bytes using BytesIO - NO utf-8 decode!
-        df = pd.read_excel(BytesIO(file_bytes), sheet_name=0)
-
-        # Make dataframe JSON safe
-        df = df.replace({np.nan: None})
-        df = df.where(pd.notnull(df), None)
-
-        # Convert columns to strings (handles special types)
-        columns = [str(c) for c in df.columns]
-
-        preview = df.head(10).to_dict('records')
+        columns, row_count, preview = excel_handler.read_preview(BytesIO(file_bytes), nrows=10)
 
         return jsonify({
             'file_id': file_id,
-            'rows': int(len(df)),
+            'rows': int(row_count),
             'columns': columns,
             'preview': preview,
             'status': 'success'
@@ -228,7 +252,7 @@ def list_macro_templates():
         for folder_type in ['macro_leading', 'macro_coincident', 'macro_international']:
             folder_id = config.DRIVE_FOLDERS.get(folder_type)
             if folder_id:
-                files = google_drive.list_files_in_folder(folder_id)
+                files = google_drive.list_files_full(folder_id)
                 templates.extend([{
                     **f,
                     'category': folder_type
@@ -354,13 +378,16 @@ def audit_templates():
         
         results = []
         
-        for template_name, file_id in templates_to_audit.items():
+        # Next files download while the current one is parsed
+        downloads = google_drive.prefetch_files(templates_to_audit.values())
+
+        for template_name, (file_id, download) in zip(templates_to_audit, downloads):
             try:
                 # Download file
-                file_bytes = google_drive.download_file_as_bytes(file_id)
+                file_bytes = download.result()
                 
                 # Read Excel - try first sheet
-                df = pd.read_excel(BytesIO(file_bytes), sheet_name=0)
+                df = excel_handler.read_excel(BytesIO(file_bytes), sheet_name=0)
                 
                 # Find date column (try common names)
                 date_col = None
@@ -480,7 +507,6 @@ def audit_templates_v2():
     """
     try:
         import openpyxl
-        import tempfile
         
         logger.info("Starting enhanced template audit...")
         
@@ -492,16 +518,15 @@ def audit_templates_v2():
         
         results = []
         
-        for template_name, file_id in templates_to_audit.items():
+        # Next files download while the current one is parsed
+        downloads = google_drive.prefetch_files(templates_to_audit.values())
+
+        for template_name, (file_id, download) in zip(templates_to_audit, downloads):
             try:
-                # Download file to temp location
-                with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-                    tmp_path = tmp.name
-                
-                google_drive.download_file(file_id, tmp_path)
+                file_bytes = download.result()
                 
                 # Load workbook to see all sheets
-                wb = openpyxl.load_workbook(tmp_path, read_only=True, data_only=True)
+                wb = openpyxl.load_workbook(BytesIO(file_bytes), read_only=True, data_only=True)
                 sheet_names = wb.sheetnames
                 
                 logger.info(f"{template_name} has sheets: {sheet_names}")
@@ -517,7 +542,7 @@ def audit_templates_v2():
                 
                 for sheet_name in data_sheets[:3]:  # Try first 3 data sheets
                     try:
-                        df = pd.read_excel(tmp_path, sheet_name=sheet_name)
+                        df = excel_handler.read_excel(BytesIO(file_bytes), sheet_name=sheet_name)
                         
                         # Skip if too few rows
                         if len(df) < 5:
@@ -614,7 +639,6 @@ def audit_templates_v2():
                         continue
                 
                 wb.close()
-                os.remove(tmp_path)
                 
                 if best_result:
                     results.append(best_result)
@@ -676,7 +700,7 @@ def backfill_yields_endpoint():
     try:
         import openpyxl
         import tempfile
-        from services.fred_api import FREDClient
+        from services.fred_api import FREDClient, observations_frame
         
         logger.info("Starting Benchmark Yields backfill...")
         
@@ -713,6 +737,9 @@ def backfill_yields_endpoint():
         results = []
         total_rows_added = 0
         
+        # Fetch all series concurrently up front
+        fetched = client.get_many_series(yield_series.values(), limit=2000, sort_order='asc')
+
         # Process each yield series
         for sheet_name, series_id in yield_series.items():
             try:
@@ -720,16 +747,13 @@ def backfill_yields_endpoint():
                     logger.warning(f"Sheet {sheet_name} not found")
                     continue
                 
-                # Fetch data from FRED
-                data = client.get_series(series_id, limit=2000, sort_order='asc')
+                data = fetched.get(series_id)
                 
                 if not data or 'observations' not in data:
                     continue
                 
                 # Convert to DataFrame
-                df = pd.DataFrame(data['observations'])
-                df['date'] = pd.to_datetime(df['date'])
-                df['value'] = pd.to_numeric(df['value'], errors='coerce')
+                df = observations_frame(data)
                 
                 # Filter to backfill range
                 df = df[df['date'] >= start_date]
@@ -918,7 +942,7 @@ def backfill_yields_v2():
     try:
         import openpyxl
         import tempfile
-        from services.fred_api import FREDClient
+        from services.fred_api import FREDClient, observations_frame
         from datetime import timedelta
         
         logger.info("Starting Benchmark Yields backfill v2...")
@@ -979,18 +1003,16 @@ def backfill_yields_v2():
         logger.info(f"Fetching data from {start_date_dt.strftime('%Y-%m-%d')} to {end_date_dt.strftime('%Y-%m-%d')}")
         
         # Fetch each series
+        # CRITICAL: Use DESC to get most recent data!
+        fetched = client.get_many_series(series_to_columns.keys(), limit=2000, sort_order='desc')
+
         all_series_data = {}
         for series_id in series_to_columns.keys():
             try:
-                # CRITICAL: Use DESC to get most recent data!
-                data = client.get_series(series_id, limit=2000, sort_order='desc')
+                data = fetched.get(series_id)
                 
                 if data and 'observations' in data:
-                    df = pd.DataFrame(data['observations'])
-                    
-                    # Convert to datetime and normalize (remove timezone info)
-                    df['date'] = pd.to_datetime(df['date']).dt.tz_localize(None)
-                    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+                    df = observations_frame(data)
                     
                     total_before_filter = len(df)
                     
@@ -1112,7 +1134,7 @@ def backfill_yields_correct():
     try:
         import openpyxl
         import tempfile
-        from services.fred_api import FREDClient
+        from services.fred_api import FREDClient, observations_frame
         
         logger.info("Starting CORRECT Benchmark Yields backfill...")
         
@@ -1161,15 +1183,15 @@ def backfill_yields_correct():
         # Fetch ALL recent data (last 2000 = ~8 years)
         logger.info("Fetching data from FRED...")
         
+        fetched = client.get_many_series(series_to_columns.keys(), limit=2000, sort_order='desc')
+
         all_series_data = {}
         for series_id in series_to_columns.keys():
             try:
-                data = client.get_series(series_id, limit=2000, sort_order='desc')
+                data = fetched.get(series_id)
                 
                 if data and 'observations' in data:
-                    df = pd.DataFrame(data['observations'])
-                    df['date'] = pd.to_datetime(df['date']).dt.tz_localize(None)
-                    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+                    df = observations_frame(data)
                     df = df.dropna(subset=['date', 'value'])
                     
                     all_series_data[series_id] = df
@@ -1253,7 +1275,7 @@ def backfill_yields_final():
         from openpyxl.chart import LineChart, Reference
         from openpyxl.chart.marker import Marker
         import tempfile
-        from services.fred_api import FREDClient
+        from services.fred_api import FREDClient, observations_frame
         
         logger.info("Starting FINAL Benchmark Yields backfill with chart creation...")
         
@@ -1304,15 +1326,15 @@ def backfill_yields_final():
         # Fetch data from FRED
         logger.info("Fetching data from FRED...")
         
+        fetched = client.get_many_series(all_series.keys(), limit=2000, sort_order='desc')
+
         all_series_data = {}
         for series_id in all_series.keys():
             try:
-                data = client.get_series(series_id, limit=2000, sort_order='desc')
+                data = fetched.get(series_id)
                 
                 if data and 'observations' in data:
-                    df = pd.DataFrame(data['observations'])
-                    df['date'] = pd.to_datetime(df['date']).dt.tz_localize(None)
-                    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+                    df = observations_frame(data)
                     df = df.dropna(subset=['date', 'value'])
                     
                     all_series_data[series_id] = df
@@ -1520,31 +1542,31 @@ def audit_all_templates():
     """
     try:
         import openpyxl
-        import tempfile
         from datetime import timedelta
         
         logger.info("Starting comprehensive audit...")
         
-        # Get template list from /macro/templates endpoint
-        import requests
-        response = requests.get(f"{request.url_root}macro/templates")
-        templates_data = response.json()
-        templates = templates_data.get('templates', [])
+        # Same template list as /macro/templates, read directly rather than
+        # through a request back into this (possibly single-worker) server
+        templates = []
+        for folder_type in ['macro_leading', 'macro_coincident', 'macro_international']:
+            folder_id = config.DRIVE_FOLDERS.get(folder_type)
+            if folder_id:
+                templates.extend(google_drive.list_files_in_folder(folder_id))
         
         logger.info(f"Found {len(templates)} templates")
         
         results = []
         
-        for template in templates:
+        # Next files download while the current one is parsed
+        downloads = google_drive.prefetch_files(t.get('id') for t in templates)
+
+        for template, (file_id, download) in zip(templates, downloads):
             try:
                 file_id = template['id']
                 file_name = template['name']
                 
-                with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-                    tmp_path = tmp.name
-                
-                google_drive.download_file(file_id, tmp_path)
-                wb = openpyxl.load_workbook(tmp_path, data_only=True)
+                wb = openpyxl.load_workbook(BytesIO(download.result()), data_only=True)
                 
                 best_result = None
                 
@@ -1594,7 +1616,6 @@ def audit_all_templates():
                             continue
                 
                 wb.close()
-                os.remove(tmp_path)
                 
                 if best_result:
                     results.append({'file_name': file_name, 'file_id': file_id, **best_result})
@@ -1626,7 +1647,7 @@ def backfill_umcsi():
     try:
         import openpyxl
         import tempfile
-        from services.fred_api import FREDClient
+        from services.fred_api import FREDClient, observations_frame
         
         logger.info("Starting UMCSI backfill...")
         
@@ -1660,15 +1681,15 @@ def backfill_umcsi():
         
         logger.info("Fetching FRED data...")
         
+        fetched = client.get_many_series(series_mapping.keys(), limit=2000, sort_order='desc')
+
         all_series_data = {}
         for series_id in series_mapping.keys():
             try:
-                data = client.get_series(series_id, limit=2000, sort_order='desc')
+                data = fetched.get(series_id)
                 
                 if data and 'observations' in data:
-                    df = pd.DataFrame(data['observations'])
-                    df['date'] = pd.to_datetime(df['date']).dt.tz_localize(None)
-                    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+                    df = observations_frame(data)
                     df = df.dropna(subset=['date', 'value'])
                     df['date'] = df['date'].dt.to_period('M').dt.to_timestamp()
                     
@@ -1981,13 +2002,16 @@ def analyze_data_sheet():
             'structure': {}
         }
         
+        # Column letters computed once and indexed by (col_num - 1) below
+        col_letters = [openpyxl.utils.get_column_letter(i) for i in range(1, ws.max_column + 1)]
+        
         # Read first 20 rows to understand structure
         first_rows = []
         for row_num in range(1, min(21, ws.max_row + 1)):
             row_data = {}
             for col_num in range(1, min(30, ws.max_column + 1)):
                 cell = ws.cell(row=row_num, column=col_num)
-                col_letter = openpyxl.utils.get_column_letter(col_num)
+                col_letter = col_letters[col_num - 1]
                 
                 cell_info = {
                     'value': str(cell.value)[:100] if cell.value else None,
@@ -2008,10 +2032,12 @@ def analyze_data_sheet():
         
         # Find where date column is
         date_col = None
+        date_col_num = None
         for col_num in range(1, ws.max_column + 1):
             cell_value = ws.cell(row=10, column=col_num).value
             if cell_value and isinstance(cell_value, datetime):
-                date_col = openpyxl.utils.get_column_letter(col_num)
+                date_col = col_letters[col_num - 1]
+                date_col_num = col_num
                 break
         
         if date_col:
@@ -2019,7 +2045,7 @@ def analyze_data_sheet():
             sample_rows = [10, 50, 100, 200, ws.max_row - 10, ws.max_row]
             for row_num in sample_rows:
                 if row_num > 0 and row_num <= ws.max_row:
-                    date_val = ws.cell(row=row_num, column=openpyxl.utils.column_index_from_string(date_col)).value
+                    date_val = ws.cell(row=row_num, column=date_col_num).value
                     date_samples.append({
                         'row': row_num,
                         'date': str(date_val) if date_val else None
@@ -2032,12 +2058,13 @@ def analyze_data_sheet():
         
         # Check for yield columns in row 2
         header_row = 2
-        yield_columns = {}
-        for col_num in range(1, ws.max_column + 1):
-            header = ws.cell(row=header_row, column=col_num).value
-            if header and any(term in str(header).lower() for term in ['yr', 'mo', 'fed', 'tips', 'date']):
-                col_letter = openpyxl.utils.get_column_letter(col_num)
-                yield_columns[col_letter] = str(header)
+        header_values = next(ws.iter_rows(min_row=header_row, max_row=header_row, values_only=True), ())
+        yield_terms = ('yr', 'mo', 'fed', 'tips', 'date')
+        yield_columns = {
+            col_letters[i]: str(header)
+            for i, header in enumerate(header_values)
+            if header and any(term in str(header).lower() for term in yield_terms)
+        }
         
         analysis['yield_columns'] = yield_columns
         
@@ -2058,6 +2085,54 @@ def analyze_data_sheet():
 # STOCK SCREENING ENDPOINTS (Week 3-5 implementation)
 #═══════════════════════════════════════════════════════════════════════════════
 
+# Dummy stock data
+TEST_STOCKS = [
+    {
+        'ticker': 'JPM',
+        'company': 'JPMorgan Chase',
+        'sector': 'Financials',
+        'price': 156.50,
+        'pe': 11.2,
+        'roe': 17.0,
+        'eps_growth_y1': 18.0,
+        'eps_growth_y2': 24.0,
+        'market_cap': 445000000000,
+        'beta': 1.19,
+        'eg_profile': 'Profile 1 - Accelerating Outperformer'
+    },
+    {
+        'ticker': 'BAC',
+        'company': 'Bank of America',
+        'sector': 'Financials',
+        'price': 32.45,
+        'pe': 10.8,
+        'roe': 14.0,
+        'eps_growth_y1': 15.0,
+        'eps_growth_y2': 22.0,
+        'market_cap': 265000000000,
+        'beta': 1.31,
+        'eg_profile': 'Profile 1 - Accelerating Outperformer'
+    },
+    {
+        'ticker': 'CAT',
+        'company': 'Caterpillar',
+        'sector': 'Industrials',
+        'price': 214.50,
+        'pe': 14.2,
+        'roe': 21.0,
+        'eps_growth_y1': 12.0,
+        'eps_growth_y2': 18.0,
+        'market_cap': 108000000000,
+        'beta': 1.21,
+        'eg_profile': 'Profile 2 - Stable Outperformer'
+    }
+]
+
+# Pre-grouped once so each request only touches the sectors it asks for
+TEST_STOCKS_BY_SECTOR = {}
+for _stock in TEST_STOCKS:
+    TEST_STOCKS_BY_SECTOR.setdefault(_stock['sector'], []).append(_stock)
+
 @app.route('/stocks/test-screen', methods=['POST'])
 def test_stock_screen():
     """
@@ -2068,51 +2143,15 @@ def test_stock_screen():
     
     data = request.get_json() or {}
     sectors = data.get('sectors', ['Financials', 'Industrials'])
+    if isinstance(sectors, str):
+        sectors = [sectors]
+    if not isinstance(sectors, list) or not all(isinstance(s, str) for s in sectors):
+        return jsonify({'error': 'sectors must be a sector name or a list of sector names'}), 400
     
-    # Dummy stock data
-    all_stocks = [
-        {
-            'ticker': 'JPM',
-            'company': 'JPMorgan Chase',
-            'sector': 'Financials',
-            'price': 156.50,
-            'pe': 11.2,
-            'roe': 17.0,
-            'eps_growth_y1': 18.0,
-            'eps_growth_y2': 24.0,
-            'market_cap': 445000000000,
-            'beta': 1.19,
-            'eg_profile': 'Profile 1 - Accelerating Outperformer'
-        },
-        {
-            'ticker': 'BAC',
-            'company': 'Bank of America',
-            'sector': 'Financials',
-            'price': 32.45,
-            'pe': 10.8,
-            'roe': 14.0,
-            'eps_growth_y1': 15.0,
-            'eps_growth_y2': 22.0,
-            'market_cap': 265000000000,
-            'beta': 1.31,
-            'eg_profile': 'Profile 1 - Accelerating Outperformer'
-        },
-        {
-            'ticker': 'CAT',
-            'company': 'Caterpillar',
-            'sector': 'Industrials',
-            'price': 214.50,
-            'pe': 14.2,
-            'roe': 21.0,
-            'eps_growth_y1': 12.0,
-            'eps_growth_y2': 18.0,
-            'market_cap': 108000000000,
-            'beta': 1.21,
-            'eg_profile': 'Profile 2 - Stable Outperformer'
-        }
-    ]
-    
-    filtered = [s for s in all_stocks if s['sector'] in sectors]
+    # Dedupe requested sectors (keeping order) and pull each pre-grouped list
+    filtered = list(chain.from_iterable(
+        TEST_STOCKS_BY_SECTOR.get(sector, ()) for sector in dict.fromkeys(sectors)
+    ))
     
     return jsonify({
         'candidates': filtered,
@@ -2268,6 +2307,39 @@ def load_stock_tickers():
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
 
+# Universe file for the fundamental screens: ticker in column A, sector in C
+SCREENER_FILE_ID = '11UwhrI8uUdr7ngWy_87rizWBEejLCdqo'
+SCREENER_SHEET = 'US Stock Screener >$1bn Mkt Cap'
+
+def _load_screener_tickers(target_sectors):
+    """Tickers of the screener universe in the given sectors, in sheet order"""
+    import openpyxl
+    import tempfile
+    
+    with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
+        tmp_path = tmp.name
+    
+    try:
+        google_drive.download_file(SCREENER_FILE_ID, tmp_path)
+        wb = openpyxl.load_workbook(tmp_path, data_only=True, keep_vba=False)
+        ws = wb[SCREENER_SHEET]
+        
+        target_tickers = []
+        for row in ws.iter_rows(min_row=2, max_row=500, values_only=True):
+            ticker = row[0]
+            sector = row[2]
+            
+            if ticker and sector and sector in target_sectors:
+                target_tickers.append(str(ticker).strip().upper())
+        
+        wb.close()
+    finally:
+        os.remove(tmp_path)
+    
+    logger.info(f"Found {len(target_tickers)} tickers in target sectors")
+    return target_tickers
+
+
 @app.route('/stocks/screen-longs', methods=['POST'])
 def screen_long_candidates():
     """
@@ -2292,31 +2364,7 @@ def screen_long_candidates():
             return jsonify({'error': 'Alpha Vantage API key not configured'}), 500
         
         # Load tickers from Excel
-        import openpyxl
-        import tempfile
-        
-        file_id = '11UwhrI8uUdr7ngWy_87rizWBEejLCdqo'
-        
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-            tmp_path = tmp.name
-        
-        google_drive.download_file(file_id, tmp_path)
-        wb = openpyxl.load_workbook(tmp_path, data_only=True, keep_vba=False)
-        ws = wb['US Stock Screener >$1bn Mkt Cap']
-        
-        # Get tickers for target sectors
-        target_tickers = []
-        for row in ws.iter_rows(min_row=2, max_row=500, values_only=True):
-            ticker = row[0]
-            sector = row[2]
-            
-            if ticker and sector and sector in target_sectors:
-                target_tickers.append(str(ticker).strip().upper())
-        
-        wb.close()
-        os.remove(tmp_path)
-        
-        logger.info(f"Found {len(target_tickers)} tickers in target sectors")
+        target_tickers = _load_screener_tickers(target_sectors)
         
         # Screen with API
         screener = StockScreener(alpha_key)
@@ -2360,43 +2408,59 @@ def screen_short_candidates():
             return jsonify({'error': 'Alpha Vantage API key not configured'}), 500
         
         # Load tickers
-        import openpyxl
-        import tempfile
+        tickers_to_screen = _load_screener_tickers(target_sectors)[:max_stocks]
         
-        file_id = '11UwhrI8uUdr7ngWy_87rizWBEejLCdqo'
+        screener = StockScreener(alpha_key)
+        candidates = screener.screen_shorts(tickers_to_screen)
         
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-            tmp_path = tmp.name
+        return jsonify({
+            'status': 'success',
+            'candidates_found': len(candidates),
+            'total_screened': len(tickers_to_screen),
+            'candidates': candidates
+        })
         
-        google_drive.download_file(file_id, tmp_path)
-        wb = openpyxl.load_workbook(tmp_path, data_only=True, keep_vba=False)
-        ws = wb['US Stock Screener >$1bn Mkt Cap']
+    except Exception as e:
+        logger.error(f"Error screening shorts: {e}")
+        import traceback
+        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+
+
+@app.route('/stocks/screen-both', methods=['POST'])
+def screen_both_candidates():
+    """
+    Screen for long and short candidates with one fetch per ticker
+    Request body: same as /stocks/screen-longs
+    """
+    try:
+        from services.stock_screener import StockScreener
         
-        target_tickers = []
-        for row in ws.iter_rows(min_row=2, max_row=500, values_only=True):
-            ticker = row[0]
-            sector = row[2]
-            
-            if ticker and sector and sector in target_sectors:
-                target_tickers.append(str(ticker).strip().upper())
+        data = request.get_json() or {}
+        target_sectors = data.get('sectors', [])
+        max_stocks = data.get('max_stocks', 10)
         
-        wb.close()
-        os.remove(tmp_path)
+        logger.info(f"Screening for longs and shorts in sectors: {target_sectors}")
         
-        tickers_to_screen = target_tickers[:max_stocks]
+        alpha_key = os.environ.get('ALPHA_VANTAGE_KEY')
+        if not alpha_key:
+            return jsonify({'error': 'Alpha Vantage API key not configured'}), 500
+        
+        tickers_to_screen = _load_screener_tickers(target_sectors)[:max_stocks]
         
         screener = StockScreener(alpha_key)
-        candidates = screener.screen_shorts(tickers_to_screen)
+        candidates = screener.screen_both(tickers_to_screen)
         
         return jsonify({
             'status': 'success',
-            'candidates_found': len(candidates),
+            'longs_found': len(candidates['longs']),
+            'shorts_found': len(candidates['shorts']),
             'total_screened': len(tickers_to_screen),
-            'candidates': candidates
+            'longs': candidates['longs'],
+            'shorts': candidates['shorts']
         })
         
     except Exception as e:
-        logger.error(f"Error screening shorts: {e}")
+        logger.error(f"Error screening longs and shorts: {e}")
         import traceback
         return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
@@ -2445,7 +2509,8 @@ def internal_error(error):
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    debug = os.environ.get('FLASK_ENV') == 'development'
+    import config
+    debug = config.get_runtime_config()['DEBUG']
     
     logger.info(f"Starting Trading System API on port {port}")
     logger.info(f"Debug mode: {debug}")
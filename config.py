@@ -6,7 +6,12 @@ Centralized configuration management
 import os
 from pathlib import Path
 import base64
+import functools
 import json
+import logging
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
 
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent
@@ -18,12 +23,19 @@ BASE_DIR = Path(__file__).resolve().parent
 # AI & Data APIs
 GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
 ALPHA_VANTAGE_KEY = os.environ.get('ALPHA_VANTAGE_KEY')
+# Alpha Vantage request budget (free tier: 5/min, premium plans: 75+)
+ALPHA_VANTAGE_CALLS_PER_MINUTE = int(os.environ.get('ALPHA_VANTAGE_CALLS_PER_MINUTE', 5))
+# Premium keys unlock bulk endpoints (REALTIME_BULK_QUOTES); set to 1 to use them
+ALPHA_VANTAGE_PREMIUM = os.environ.get('ALPHA_VANTAGE_PREMIUM', '0') == '1'
 FRED_API_KEY = os.environ.get('FRED_API_KEY')
 
 # Communication
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
 
+# Cache (optional - shared caches are skipped when unset)
+REDIS_URL = os.environ.get('REDIS_URL')
+
 #═══════════════════════════════════════════════════════════════════════════════
 # GOOGLE DRIVE AUTHENTICATION
 #═══════════════════════════════════════════════════════════════════════════════
@@ -31,32 +43,39 @@ TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
 # Google Drive - Handle both file and base64 encoding
 GOOGLE_SERVICE_ACCOUNT_BASE64 = os.environ.get('GOOGLE_SERVICE_ACCOUNT_BASE64')
 
-if GOOGLE_SERVICE_ACCOUNT_BASE64:
-    # Decode base64 and save to temp file
-    import tempfile
-    
-    try:
+# Fallback to local file when no base64 payload is provided
+GOOGLE_SERVICE_ACCOUNT_FILE = os.environ.get(
+    'GOOGLE_SERVICE_ACCOUNT_FILE',
+    str(BASE_DIR / 'data' / 'google-service-account.json')
+)
+
+@functools.lru_cache(maxsize=1)
+def get_service_account_info():
+    """
+    Load the Google service account key as a dict (decoded once per process)
+
+    Prefers GOOGLE_SERVICE_ACCOUNT_BASE64 and falls back to
+    GOOGLE_SERVICE_ACCOUNT_FILE. Nothing is written to disk.
+    """
+    if GOOGLE_SERVICE_ACCOUNT_BASE64:
         decoded = base64.b64decode(GOOGLE_SERVICE_ACCOUNT_BASE64)
-        
-        # Create a persistent temp file
-        fd, temp_path = tempfile.mkstemp(suffix='.json', text=True)
-        
-        with os.fdopen(fd, 'w') as temp_file:
-            temp_file.write(decoded.decode('utf-8'))
-        
-        GOOGLE_SERVICE_ACCOUNT_FILE = temp_path
-        print(f"✅ Google service account loaded from base64 → {temp_path}")
-        
-    except Exception as e:
-        print(f"❌ Error decoding GOOGLE_SERVICE_ACCOUNT_BASE64: {e}")
-        GOOGLE_SERVICE_ACCOUNT_FILE = str(BASE_DIR / 'data' / 'google-service-account.json')
-else:
-    # Fallback to local file
-    GOOGLE_SERVICE_ACCOUNT_FILE = os.environ.get(
-        'GOOGLE_SERVICE_ACCOUNT_FILE',
-        str(BASE_DIR / 'data' / 'google-service-account.json')
-    )
-    print(f"📁 Using local service account file: {GOOGLE_SERVICE_ACCOUNT_FILE}")
+        logger.info("Google service account loaded from base64")
+        return json.loads(decoded)
+
+    with open(GOOGLE_SERVICE_ACCOUNT_FILE) as f:
+        info = json.load(f)
+    logger.info(f"Google service account loaded from {GOOGLE_SERVICE_ACCOUNT_FILE}")
+    return info
+
+@functools.lru_cache(maxsize=1)
+def load_service_account_credentials():
+    """
+    Build (unscoped) service account credentials from the cached key info
+
+    Callers add their own scopes with credentials.with_scopes(...).
+    """
+    from google.oauth2 import service_account
+    return service_account.Credentials.from_service_account_info(get_service_account_info())
 
 #═══════════════════════════════════════════════════════════════════════════════
 # GOOGLE DRIVE FOLDER IDS
@@ -80,6 +99,9 @@ DRIVE_FOLDERS = {
     'outputs': os.environ.get('DRIVE_OUTPUTS', '1Fqd223RMG9oZzKld7H55l68KSYayyZIL')
 }
 
+# Folder IDs only come from the environment, so this is computed once
+DRIVE_FOLDERS_UNSET = all(v == 'UPDATE_ME' for v in DRIVE_FOLDERS.values())
+
 # Key template file IDs (update after Day 1)
 KEY_FILES = {
     'us_sector_data': os.environ.get('FILE_US_SECTOR_DATA', '11UwhrI8uUdr7ngWy_87rizWBEejLCdqo'),
@@ -108,6 +130,13 @@ TARGET_BETA_BULLISH = (0.50, 0.70)    # Bullish: Higher beta OK
 TARGET_BETA_NEUTRAL = (0.30, 0.50)    # Neutral: Moderate beta
 TARGET_BETA_BEARISH = (0.00, 0.20)    # Bearish: Low/zero beta
 
+BETA_TARGETS = MappingProxyType({
+    'EXPANSION': TARGET_BETA_BULLISH,
+    'LATE_CYCLE': TARGET_BETA_NEUTRAL,
+    'RECESSION': TARGET_BETA_BEARISH,
+    'RECOVERY': TARGET_BETA_NEUTRAL
+})
+
 # Exposure Limits
 MAX_GROSS_EXPOSURE = float(os.environ.get('MAX_GROSS', 2.00))  # 200%
 MAX_NET_EXPOSURE = float(os.environ.get('MAX_NET', 0.70))      # 70%
@@ -149,25 +178,25 @@ MACRO_WEIGHTS = {
     'international': 0.05
 }
 
-# Sector Recommendations by Regime
-SECTOR_PREFERENCES = {
-    'EXPANSION': {
-        'longs': ['Financials', 'Industrials', 'Materials', 'Technology'],
-        'shorts': ['Utilities', 'Consumer Staples']
-    },
-    'LATE_CYCLE': {
-        'longs': ['Technology', 'Healthcare', 'Consumer Staples'],
-        'shorts': ['Financials', 'Materials']
-    },
-    'RECESSION': {
-        'longs': ['Utilities', 'Consumer Staples', 'Healthcare'],
-        'shorts': ['Financials', 'Industrials', 'Materials', 'Consumer Discretionary']
-    },
-    'RECOVERY': {
-        'longs': ['Industrials', 'Materials', 'Financials', 'Real Estate'],
-        'shorts': ['Utilities']
-    }
-}
+# Sector Recommendations by Regime (frozensets for O(1) membership tests)
+SECTOR_PREFERENCES = MappingProxyType({
+    'EXPANSION': MappingProxyType({
+        'longs': frozenset(['Financials', 'Industrials', 'Materials', 'Technology']),
+        'shorts': frozenset(['Utilities', 'Consumer Staples'])
+    }),
+    'LATE_CYCLE': MappingProxyType({
+        'longs': frozenset(['Technology', 'Healthcare', 'Consumer Staples']),
+        'shorts': frozenset(['Financials', 'Materials'])
+    }),
+    'RECESSION': MappingProxyType({
+        'longs': frozenset(['Utilities', 'Consumer Staples', 'Healthcare']),
+        'shorts': frozenset(['Financials', 'Industrials', 'Materials', 'Consumer Discretionary'])
+    }),
+    'RECOVERY': MappingProxyType({
+        'longs': frozenset(['Industrials', 'Materials', 'Financials', 'Real Estate']),
+        'shorts': frozenset(['Utilities'])
+    })
+})
 
 #═══════════════════════════════════════════════════════════════════════════════
 # SCREENING CRITERIA
@@ -192,10 +221,10 @@ SCREEN_SHORTS = {
 }
 
 # EG Profile Settings
-EG_PROFILES = {
-    'longs': [1, 2, 4, 5],     # Accelerating/Outperforming profiles
-    'shorts': [1, 2, 3, 4]     # Decelerating/Underperforming profiles
-}
+EG_PROFILES = MappingProxyType({
+    'longs': frozenset([1, 2, 4, 5]),     # Accelerating/Outperforming profiles
+    'shorts': frozenset([1, 2, 3, 4])     # Decelerating/Underperforming profiles
+})
 
 # Technical Filters
 TECHNICAL_FILTERS = {
@@ -289,21 +318,21 @@ def validate_config():
             errors.append(f"Missing required environment variable: {key_name}")
     
     # Check Google service account
-    if GOOGLE_SERVICE_ACCOUNT_BASE64:
-        # Using base64 - validate it decodes properly
+    if not GOOGLE_SERVICE_ACCOUNT_BASE64 and not os.path.exists(GOOGLE_SERVICE_ACCOUNT_FILE):
+        errors.append(f"Google service account file not found: {GOOGLE_SERVICE_ACCOUNT_FILE}")
+    else:
         try:
-            decoded = base64.b64decode(GOOGLE_SERVICE_ACCOUNT_BASE64)
-            json.loads(decoded)  # Ensure valid JSON
+            get_service_account_info()  # Ensure it decodes to valid JSON
         except Exception as e:
-            errors.append(f"Invalid GOOGLE_SERVICE_ACCOUNT_BASE64: {e}")
-    else:
-        # Using file path - check it exists
-        if not os.path.exists(GOOGLE_SERVICE_ACCOUNT_FILE):
-            errors.append(f"Google service account file not found: {GOOGLE_SERVICE_ACCOUNT_FILE}")
+            source = 'GOOGLE_SERVICE_ACCOUNT_BASE64' if GOOGLE_SERVICE_ACCOUNT_BASE64 else 'GOOGLE_SERVICE_ACCOUNT_FILE'
+            errors.append(f"Invalid {source}: {e}")
     
-    # Warnings for folder IDs (not critical for initial setup)
-    if all(v == 'UPDATE_ME' for v in DRIVE_FOLDERS.values()):
-        print("WARNING: Google Drive folder IDs not configured yet. Update after Day 1.")
+    # Warnings for folder IDs (not critical for initial setup, fatal in production)
+    if DRIVE_FOLDERS_UNSET:
+        if get_runtime_config()['ENV'] == 'production':
+            errors.append("Google Drive folder IDs not configured")
+        else:
+            logger.warning("Google Drive folder IDs not configured yet. Update after Day 1.")
     
     # Raise errors if any
     if errors:
@@ -313,13 +342,7 @@ def validate_config():
 
 def get_beta_target(regime):
     """Get beta target range based on macro regime"""
-    targets = {
-        'EXPANSION': TARGET_BETA_BULLISH,
-        'LATE_CYCLE': TARGET_BETA_NEUTRAL,
-        'RECESSION': TARGET_BETA_BEARISH,
-        'RECOVERY': TARGET_BETA_NEUTRAL
-    }
-    return targets.get(regime, TARGET_BETA_NEUTRAL)
+    return BETA_TARGETS.get(regime, TARGET_BETA_NEUTRAL)
 
 def get_sector_preferences(regime):
     """Get sector preferences based on macro regime"""
@@ -329,12 +352,20 @@ def get_sector_preferences(regime):
 # ENVIRONMENT-SPECIFIC OVERRIDES
 #═══════════════════════════════════════════════════════════════════════════════
 
-if os.environ.get('FLASK_ENV') == 'development':
-    # Development settings
-    print("Running in DEVELOPMENT mode")
-    GROQ_MAX_TOKENS = 500  # Faster for testing
-
-elif os.environ.get('FLASK_ENV') == 'production':
-    # Production settings
-    print("Running in PRODUCTION mode")
-    # Could add production-specific overrides here
+@functools.lru_cache(maxsize=1)
+def get_runtime_config():
+    """
+    Environment-specific settings resolved from FLASK_ENV
+
+    Module constants above stay environment-independent; read overrides
+    from here (e.g. get_runtime_config()['GROQ_MAX_TOKENS']).
+    Call get_runtime_config.cache_clear() after changing FLASK_ENV.
+    """
+    env = os.environ.get('FLASK_ENV')
+    development = env == 'development'
+
+    return MappingProxyType({
+        'ENV': env,
+        'DEBUG': development,
+        'GROQ_MAX_TOKENS': 500 if development else GROQ_MAX_TOKENS,  # Faster for testing
+    })
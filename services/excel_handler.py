@@ -3,15 +3,148 @@ Excel Handler Service
 Handles reading and writing Excel files with Google Drive integration
 """
 
+import numpy as np
 import pandas as pd
-import openpyxl
-import tempfile
-import os
 import logging
+import threading
+from collections import OrderedDict
+from itertools import chain
 from io import BytesIO
+from datetime import datetime, date
+from utils import xlsx_zip
 
 logger = logging.getLogger(__name__)
 
+# openpyxl and xlsxwriter are imported inside the functions that need them:
+# reads go through calamine and cell updates through the ZIP patcher, so
+# most processes never pay for loading them
+
+# python-calamine (Rust) parses xlsx several times faster than openpyxl with
+# flat memory; pandas gained the engine in 2.2
+try:
+    from python_calamine import CalamineWorkbook
+    READ_ENGINE = 'calamine' if tuple(map(int, pd.__version__.split('.')[:2])) >= (2, 2) else None
+except ImportError:
+    CalamineWorkbook = None
+    READ_ENGINE = None
+
+# Day zero of Excel's 1900 date system (serial = days since this)
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+
+# Parsed sheets keyed by (file_id, revision, sheet_name). A new Drive
+# revision changes the key, so stale entries are never served
+FRAME_CACHE_SIZE = 32
+_frame_cache = OrderedDict()
+_frame_cache_lock = threading.Lock()
+
+# Values from read_cells, keyed by (file_id, revision, sheet_name, cells)
+_cell_cache = OrderedDict()
+
+def _invalidate_frames(file_id):
+    """Drop cached DataFrames and cell values for a file after writing to it"""
+    with _frame_cache_lock:
+        for cache in (_frame_cache, _cell_cache):
+            for key in [k for k in cache if k[0] == file_id]:
+                del cache[key]
+
+def _cached_frame(file_id, sheet_name, header=0, revision=None):
+    """
+    Parse a Drive sheet, reusing the last parse while the file is unchanged
+
+    One metadata call yields the file's revision (skipped when the caller
+    already has it); a parse of that revision in memory is reused instead of
+    downloading.
+
+    Returns:
+        pandas.DataFrame: Shared cached frame (callers must copy before mutating)
+    """
+    from services import google_drive
+
+    if revision is None:
+        revision = google_drive.get_file_revision(file_id)
+    key = (file_id, revision, sheet_name, header)
+    with _frame_cache_lock:
+        df = _frame_cache.get(key)
+        if df is not None:
+            _frame_cache.move_to_end(key)
+            return df
+
+    file_bytes = google_drive.download_file_as_bytes(file_id)
+    df = read_excel(BytesIO(file_bytes), sheet_name=sheet_name, header=header)
+
+    with _frame_cache_lock:
+        _frame_cache[key] = df
+        while len(_frame_cache) > FRAME_CACHE_SIZE:
+            _frame_cache.popitem(last=False)
+    return df
+
+def read_excel(source, sheet_name=0, **kwargs):
+    """
+    pandas.read_excel using calamine when available (openpyxl otherwise)
+
+    Args:
+        source: Path or binary file-like object
+        sheet_name: Sheet name or index (defaults to first sheet)
+
+    Returns:
+        pandas.DataFrame: Sheet data
+    """
+    return pd.read_excel(source, sheet_name=sheet_name, engine=READ_ENGINE, **kwargs)
+
+def read_preview(source, nrows=10):
+    """
+    First sheet as JSON-ready records (header row = column names)
+
+    Uses calamine's native rows directly when installed, skipping the
+    DataFrame build and NaN cleanup passes.
+
+    Args:
+        source: Binary file-like object
+        nrows: Number of records to return
+
+    Returns:
+        tuple: (columns, row_count, records)
+    """
+    if CalamineWorkbook is None:
+        df = read_excel(source, sheet_name=0)
+        df = df.astype(object).where(pd.notnull(df), None)
+        columns = [str(c) for c in df.columns]
+        return columns, len(df), df.head(nrows).to_dict('records')
+
+    # Like pandas' calamine reader: keep leading blank columns (they become
+    # 'Unnamed: i'), and skip blank rows, header included
+    rows = CalamineWorkbook.from_filelike(source).get_sheet_by_index(0).to_python(skip_empty_area=False)
+    rows = [row for row in rows if any(v != '' for v in row)]
+    if not rows:
+        return [], 0, []
+
+    # Column names as pandas makes them: blanks -> 'Unnamed: i', repeats -> 'x.1'
+    columns = []
+    seen = {}
+    for i, name in enumerate(rows[0]):
+        name = _cell_value(name)
+        name = f'Unnamed: {i}' if name is None else str(name)
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        columns.append(name)
+
+    records = [
+        dict(zip(columns, (_cell_value(v) for v in row)))
+        for row in rows[1:nrows + 1]
+    ]
+    return columns, len(rows) - 1, records
+
+def _cell_value(value):
+    """Calamine cell -> JSON value (blank '' -> None, 5.0 -> 5)"""
+    if value == '':
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
 def read_excel_from_drive(file_id, sheet_name=None):
     """
     Read Excel file from Google Drive into pandas DataFrame
@@ -24,9 +157,6 @@ def read_excel_from_drive(file_id, sheet_name=None):
         pandas.DataFrame: Excel data
     """
     try:
-        # Import here to avoid circular imports
-        from services import google_drive
-
         # Ensure file_id is a clean string
         if isinstance(file_id, bytes):
             file_id = file_id.decode('utf-8')
@@ -34,19 +164,85 @@ def read_excel_from_drive(file_id, sheet_name=None):
 
         logger.info(f"Reading Excel file with ID: {file_id}")
 
-        # Download file as bytes
-        file_bytes = google_drive.download_file_as_bytes(file_id)
-
-        # Read with pandas from bytes
-        df = pd.read_excel(BytesIO(file_bytes), sheet_name=sheet_name or 0)
+        df = _cached_frame(file_id, sheet_name or 0)
 
         logger.info(f"Excel file read successfully: {len(df)} rows from {file_id}")
-        return df
+        # Callers may mutate the frame; keep the cached one pristine
+        return df.copy()
 
     except Exception as e:
         logger.error(f"Error reading Excel from Drive: {e}")
         raise
 
+def read_cells(file_id, sheet_name, cells, revision=None):
+    """
+    Read a few individual cells without building a DataFrame
+
+    Only rows up to the lowest requested cell are parsed, and values are
+    cached per file revision.
+
+    Args:
+        file_id: Google Drive file ID (string)
+        sheet_name: Sheet name
+        cells: A1 references, e.g. ('K4', 'G4')
+        revision: File revision if already known (see google_drive.get_file_revisions)
+
+    Returns:
+        tuple: Cell values in the order requested (None for blanks)
+    """
+    try:
+        from services import google_drive
+
+        if isinstance(file_id, bytes):
+            file_id = file_id.decode('utf-8')
+        file_id = str(file_id).strip()
+        cells = tuple(cells)
+
+        if revision is None:
+            revision = google_drive.get_file_revision(file_id)
+        key = (file_id, revision, sheet_name, cells)
+        with _frame_cache_lock:
+            values = _cell_cache.get(key)
+            if values is not None:
+                _cell_cache.move_to_end(key)
+                return values
+
+        positions = [xlsx_zip.split_cell_ref(cell) for cell in cells]
+        max_row = max(row for row, _ in positions)
+        max_col = max(col for _, col in positions)
+        source = BytesIO(google_drive.download_file_as_bytes(file_id))
+
+        if CalamineWorkbook is not None:
+            sheet = CalamineWorkbook.from_filelike(source).get_sheet_by_name(sheet_name)
+            grid = sheet.to_python(skip_empty_area=False, nrows=max_row)
+        else:
+            import openpyxl
+
+            wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+            try:
+                grid = list(wb[sheet_name].iter_rows(
+                    min_row=1, max_row=max_row, max_col=max_col, values_only=True
+                ))
+            finally:
+                wb.close()
+
+        values = []
+        for row, col in positions:
+            line = grid[row - 1] if row <= len(grid) else ()
+            value = line[col - 1] if col <= len(line) else None
+            values.append(None if value == '' else value)
+        values = tuple(values)
+
+        with _frame_cache_lock:
+            _cell_cache[key] = values
+            while len(_cell_cache) > FRAME_CACHE_SIZE:
+                _cell_cache.popitem(last=False)
+        return values
+
+    except Exception as e:
+        logger.error(f"Error reading cells from {sheet_name} in {file_id}: {e}")
+        raise
+
 def write_excel_to_drive(df, file_id, sheet_name='Sheet1'):
     """
     Write pandas DataFrame to Excel file on Google Drive
@@ -67,17 +263,28 @@ def write_excel_to_drive(df, file_id, sheet_name='Sheet1'):
             file_id = file_id.decode('utf-8')
         file_id = str(file_id).strip()
 
-        # Write to temp file
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-            tmp_path = tmp.name
-
-        df.to_excel(tmp_path, sheet_name=sheet_name, index=False)
+        matrix = _numeric_matrix(df)
+        if matrix is not None:
+            # All numeric/datetime: convert once, no per-cell type dispatch
+            values, date_columns = matrix
+            rows = values.tolist()
+        else:
+            # Blank cells for NaN/NaT, as DataFrame.to_excel does
+            rows = (
+                [None if pd.isna(v) else v for v in row]
+                for row in df.itertuples(index=False, name=None)
+            )
+            date_columns = ()
 
-        # Upload to Drive
-        result = google_drive.upload_file(tmp_path, file_id=file_id)
+        content = _xlsx_from_rows(sheet_name, df.columns, rows, date_columns)
 
-        # Clean up
-        os.remove(tmp_path)
+        # Upload to Drive straight from memory
+        _invalidate_frames(file_id)
+        result = google_drive.upload_bytes(
+            content,
+            file_id=file_id,
+            mime_type=google_drive.XLSX_MIME_TYPE
+        )
 
         logger.info(f"Wrote {len(df)} rows to file {file_id}")
         return result
@@ -86,6 +293,74 @@ def write_excel_to_drive(df, file_id, sheet_name='Sheet1'):
         logger.error(f"Error writing Excel to Drive: {e}")
         raise
 
+def _xlsx_from_rows(sheet_name, columns, rows, date_columns=()):
+    """
+    Stream a header and rows into a single-sheet xlsx
+
+    constant_memory flushes each row to disk once the next one starts, so
+    memory stays at one row however many rows the iterable yields.
+
+    Returns:
+        bytes: xlsx package
+    """
+    import xlsxwriter
+
+    buffer = BytesIO()
+    wb = xlsxwriter.Workbook(buffer, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'remove_timezone': True,
+        'strings_to_urls': False
+    })
+    ws = wb.add_worksheet(sheet_name)
+    ws.write_row(0, 0, [str(c) for c in columns])
+
+    if date_columns:
+        date_format = wb.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+        for col in date_columns:
+            ws.set_column(col, col, None, date_format)
+
+    for i, row in enumerate(rows, 1):
+        ws.write_row(i, 0, row)
+    wb.close()
+    return buffer.getvalue()
+
+def _aligned_rows(df, columns):
+    """Yield df rows laid out by columns (blank where df lacks one or NaN/NaT)"""
+    positions = {c: i for i, c in enumerate(df.columns)}
+    picks = [positions.get(c) for c in columns]
+    for row in df.itertuples(index=False, name=None):
+        yield [None if i is None or pd.isna(row[i]) else row[i] for i in picks]
+
+def _numeric_matrix(df):
+    """
+    Convert an all-numeric/datetime frame to an object matrix of floats
+
+    Datetimes become Excel serials, NaN/NaT become None (blank cells).
+
+    Returns:
+        tuple: (numpy object array, datetime column positions),
+               or None if any column is text/bool/tz-aware
+    """
+    columns = []
+    date_columns = []
+    for i, (_, col) in enumerate(df.items()):
+        if pd.api.types.is_datetime64_dtype(col.dtype):
+            columns.append((col - EXCEL_EPOCH) / pd.Timedelta(days=1))
+            date_columns.append(i)
+        elif pd.api.types.is_numeric_dtype(col.dtype) and not pd.api.types.is_bool_dtype(col.dtype):
+            columns.append(col)
+        else:
+            return None
+
+    if not columns:
+        return None
+
+    floats = np.column_stack([c.to_numpy(dtype=float, na_value=np.nan) for c in columns])
+    values = floats.astype(object)
+    values[~np.isfinite(floats)] = None
+    return values, date_columns
+
 def update_cell_in_drive(file_id, sheet_name, cell, value):
     """
     Update a single cell in Excel file on Google Drive
@@ -99,6 +374,19 @@ def update_cell_in_drive(file_id, sheet_name, cell, value):
     Returns:
         dict: Updated file metadata
     """
+    return update_cells_in_drive(file_id, [(sheet_name, cell, value)])
+
+def update_cells_in_drive(file_id, updates):
+    """
+    Update several cells in one round trip
+
+    Args:
+        file_id: Google Drive file ID (string)
+        updates: List of (sheet_name, cell, value) tuples
+
+    Returns:
+        dict: Updated file metadata (Sheets API response for native sheets)
+    """
     try:
         from services import google_drive
 
@@ -106,59 +394,157 @@ def update_cell_in_drive(file_id, sheet_name, cell, value):
         if isinstance(file_id, bytes):
             file_id = file_id.decode('utf-8')
         file_id = str(file_id).strip()
-
-        logger.info(f"Updating cell {cell} in file {file_id}")
-
-        # Download file to temp location
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-            tmp_path = tmp.name
-
-        google_drive.download_file(file_id, tmp_path)
-
-        # Update cell using openpyxl
-        wb = openpyxl.load_workbook(tmp_path)
-
-        if sheet_name not in wb.sheetnames:
-            available = wb.sheetnames
-            wb.close()
-            os.remove(tmp_path)
-            raise ValueError(
-                f"Sheet '{sheet_name}' not found. Available: {available}"
-            )
-
-        ws = wb[sheet_name]
-        ws[cell] = value
-        wb.save(tmp_path)
-        wb.close()
-
-        logger.info(f"Updated cell {cell} to '{value}' in sheet '{sheet_name}'")
-
-        # Upload back to Drive
-        result = google_drive.upload_file(tmp_path, file_id=file_id)
-
-        # Clean up
-        os.remove(tmp_path)
-
-        logger.info(f"Cell {cell} updated successfully in {file_id}")
+        updates = list(updates)
+
+        logger.info(f"Updating {len(updates)} cell(s) in file {file_id}")
+
+        # Native Google Sheets: a single values.batchUpdate call, no file transfer
+        if google_drive.get_mime_type(file_id) == google_drive.GOOGLE_SHEET_MIME_TYPE:
+            result = google_drive.get_sheets_service().spreadsheets().values().batchUpdate(
+                spreadsheetId=file_id,
+                body={
+                    'valueInputOption': 'RAW',
+                    'data': [
+                        {'range': _a1_range(sheet_name, cell), 'values': [[_sheets_value(value)]]}
+                        for sheet_name, cell, value in updates
+                    ]
+                }
+            ).execute()
+            logger.info(f"{len(updates)} cell(s) updated via Sheets API in {file_id}")
+            return result
+
+        # Work on the download in memory (no temp file round trip)
+        source = BytesIO(google_drive.download_file_as_bytes(file_id))
+
+        # Patch only the target sheets' XML; every other part is copied as-is
+        buffer = BytesIO()
+        try:
+            xlsx_zip.patch_cells(source, buffer, updates)
+        except xlsx_zip.XlsxPatchError as e:
+            logger.warning(f"In-place patch not possible ({e}), rewriting with openpyxl")
+            source.seek(0)
+            buffer = _update_cells_with_openpyxl(source, updates)
+        source = None  # the original package is no longer needed during upload
+
+        # Upload the patched package straight from memory in one PATCH body
+        _invalidate_frames(file_id)
+        result = google_drive.upload_bytes(
+            buffer.getvalue(),
+            file_id=file_id,
+            mime_type=google_drive.XLSX_MIME_TYPE
+        )
+
+        logger.info(f"{len(updates)} cell(s) updated successfully in {file_id}")
         return result
 
     except Exception as e:
-        logger.error(f"Error updating cell in Drive: {e}")
+        logger.error(f"Error updating cells in Drive: {e}")
         raise
 
+def _a1_range(sheet_name, cell):
+    """Sheets API A1 range with the sheet name quoted"""
+    return "'" + sheet_name.replace("'", "''") + "'!" + cell
+
+def _sheets_value(value):
+    """Convert a Python/NumPy value to something the Sheets API accepts as JSON"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        # NumPy scalar -> Python scalar
+        return value.item()
+    return value
+
+def _update_cells_with_openpyxl(src, updates):
+    """Full openpyxl load/save for workbooks the ZIP patcher can't handle"""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(src)
+    try:
+        for sheet_name, cell, value in updates:
+            if sheet_name not in wb.sheetnames:
+                raise ValueError(
+                    f"Sheet '{sheet_name}' not found. Available: {wb.sheetnames}"
+                )
+            wb[sheet_name][cell] = value
+
+        buffer = BytesIO()
+        wb.save(buffer)
+        return buffer
+    finally:
+        wb.close()
+
 def append_rows_to_drive(file_id, sheet_name, new_data):
     """
     Append rows to existing Excel file on Google Drive
+
+    Columns of new_data are matched to the sheet's header row by name.
+    Existing rows are never read: native Google Sheets use values.append
+    and xlsx files get new <row> elements spliced after the last row with
+    cells (styled blank rows included, as openpyxl's max_row).
     """
     try:
+        from services import google_drive
+
         # Ensure file_id is a clean string
         if isinstance(file_id, bytes):
             file_id = file_id.decode('utf-8')
         file_id = str(file_id).strip()
 
-        existing_df = read_excel_from_drive(file_id, sheet_name)
-        combined_df = pd.concat([existing_df, new_data], ignore_index=True)
-        result = write_excel_to_drive(combined_df, file_id, sheet_name)
+        if google_drive.get_mime_type(file_id) == google_drive.GOOGLE_SHEET_MIME_TYPE:
+            values = google_drive.get_sheets_service().spreadsheets().values()
+            header = values.get(
+                spreadsheetId=file_id,
+                range=_a1_range(sheet_name, '1:1')
+            ).execute().get('values', [[]])[0]
+
+            rows = _align_to_header(new_data, header)
+            if rows is None:
+                raise ValueError(
+                    f"Columns {list(new_data.columns)} don't match header of sheet '{sheet_name}'"
+                )
+
+            result = values.append(
+                spreadsheetId=file_id,
+                range=_a1_range(sheet_name, 'A1'),
+                valueInputOption='RAW',
+                insertDataOption='INSERT_ROWS',
+                body={'values': [[_sheets_value(v) for v in row] for row in rows]}
+            ).execute()
+            logger.info(f"Appended {len(new_data)} rows to file {file_id} via Sheets API")
+            return result
+
+        source = BytesIO(google_drive.download_file_as_bytes(file_id))
+
+        buffer = None
+        rows = _align_to_header(new_data, xlsx_zip.read_header(source, sheet_name))
+        if rows is not None:
+            buffer = BytesIO()
+            try:
+                xlsx_zip.append_rows(source, buffer, sheet_name, rows)
+            except xlsx_zip.XlsxPatchError as e:
+                logger.warning(f"In-place append not possible ({e}), rewriting sheet")
+                buffer = None
+
+        if buffer is None:
+            # New columns or unpatchable layout: rewrite the sheet, streaming
+            # existing then new rows into the writer (no concatenated copy)
+            source.seek(0)
+            existing_df = read_excel(source, sheet_name=sheet_name)
+            known = set(existing_df.columns)
+            columns = list(existing_df.columns) + [c for c in new_data.columns if c not in known]
+            rows = chain(_aligned_rows(existing_df, columns), _aligned_rows(new_data, columns))
+            content = _xlsx_from_rows(sheet_name, columns, rows)
+        else:
+            content = buffer.getvalue()
+
+        _invalidate_frames(file_id)
+        result = google_drive.upload_bytes(
+            content,
+            file_id=file_id,
+            mime_type=google_drive.XLSX_MIME_TYPE
+        )
 
         logger.info(f"Appended {len(new_data)} rows to file {file_id}")
         return result
@@ -167,6 +553,33 @@ def append_rows_to_drive(file_id, sheet_name, new_data):
         logger.error(f"Error appending rows: {e}")
         raise
 
+def _align_to_header(new_data, header):
+    """
+    Lay out DataFrame rows by the sheet's header positions
+
+    Returns:
+        list: Row value lists, or None if a column isn't in the header
+    """
+    columns = [str(c) for c in new_data.columns]
+    positions = {}
+    for i, name in enumerate(header):
+        if name is not None:
+            positions.setdefault(str(name), i)
+
+    # Empty sheet (no header yet) or new columns: caller rewrites instead
+    if not positions or any(name not in positions for name in columns):
+        return None
+
+    targets = [positions[name] for name in columns]
+    width = max(targets, default=-1) + 1
+    rows = []
+    for row in new_data.itertuples(index=False, name=None):
+        out = [None] * width
+        for i, v in zip(targets, row):
+            out[i] = None if pd.isna(v) else v
+        rows.append(out)
+    return rows
+
 def get_excel_info(file_id):
     """
     Get information about Excel file (sheets, dimensions)
@@ -179,23 +592,26 @@ def get_excel_info(file_id):
             file_id = file_id.decode('utf-8')
         file_id = str(file_id).strip()
 
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-            tmp_path = tmp.name
-
-        google_drive.download_file(file_id, tmp_path)
+        source = BytesIO(google_drive.download_file_as_bytes(file_id))
 
-        wb = openpyxl.load_workbook(tmp_path, read_only=True)
+        # Sizes come from each sheet's <dimension> element, so no sheet
+        # data is scanned; openpyxl only for sheets that lack one
+        dimensions = xlsx_zip.read_dimensions(source)
+        missing = [name for name, dims in dimensions.items() if dims is None]
+        if missing:
+            import openpyxl
 
-        sheets_info = {}
-        for name in wb.sheetnames:
-            ws = wb[name]
-            sheets_info[name] = {
-                'max_row': ws.max_row,
-                'max_column': ws.max_column
-            }
+            source.seek(0)
+            wb = openpyxl.load_workbook(source, read_only=True)
+            for name in missing:
+                ws = wb[name]
+                dimensions[name] = (ws.max_row, ws.max_column)
+            wb.close()
 
-        wb.close()
-        os.remove(tmp_path)
+        sheets_info = {
+            name: {'max_row': max_row, 'max_column': max_column}
+            for name, (max_row, max_column) in dimensions.items()
+        }
 
         return {
             'file_id': file_id,
@@ -4,13 +4,75 @@ Federal Reserve Economic Data - Real-time macro indicators
 """
 
 import os
-import requests
 import logging
+import threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import pandas as pd
+from utils.http import create_session
 
 logger = logging.getLogger(__name__)
 
+# Max concurrent FRED requests (FRED allows 120 requests/minute per key)
+MAX_WORKERS = 16
+
+# Shared keep-alive pool, sized for the get_multiple_series fan-out
+_session = create_session(pool_connections=4, pool_maxsize=MAX_WORKERS)
+
+# Latest observations change at most daily: {series_id: (value, date)} for
+# _latest_day only. Shared by get_multiple_series' worker threads
+_latest_cache = {}
+_latest_day = None
+_latest_lock = threading.Lock()
+
+def _latest_entries(day):
+    """Today's latest-value cache, dropping entries from earlier days (hold _latest_lock)"""
+    global _latest_day
+    if day != _latest_day:
+        _latest_cache.clear()
+        _latest_day = day
+    return _latest_cache
+
+# Conditional-GET validators and bodies, one JSON file per request so a
+# restart keeps them: {(series_id, limit, sort_order): {etag, last_modified, data}}
+CACHE_DIR = os.environ.get('FRED_CACHE_DIR', os.path.join('cache', 'fred'))
+_conditional_cache = {}
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, '{}_{}_{}.json'.format(*key))
+
+def _load_conditional(key):
+    """Cached validators/body for a request ({} if none)"""
+    entry = _conditional_cache.get(key)
+    if entry is None:
+        try:
+            with open(_cache_path(key), 'rb') as f:
+                entry = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            entry = {}
+        _conditional_cache[key] = entry
+    return entry
+
+def _store_conditional(key, response, data):
+    """Remember the body if the server sent ETag/Last-Modified validators"""
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return
+
+    entry = {'etag': etag, 'last_modified': last_modified, 'data': data}
+    _conditional_cache[key] = entry
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = _cache_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(entry))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not persist FRED cache entry {key}: {e}")
+
 class FREDClient:
     """
     Client for Federal Reserve Economic Data API
@@ -24,6 +86,11 @@ class FREDClient:
             raise ValueError("FRED_API_KEY not found in environment variables")
         
         self.base_url = "https://api.stlouisfed.org/fred"
+
+        # Built once; each request only adds its per-call params
+        self._observations_url = f"{self.base_url}/series/observations"
+        self._series_url = f"{self.base_url}/series"
+        self._base_params = {'api_key': self.api_key, 'file_type': 'json'}
         logger.info("FRED client initialized")
     
     def get_series(self, series_id, limit=100, sort_order='desc'):
@@ -39,19 +106,31 @@ class FREDClient:
             dict: Series data with observations
         """
         try:
-            url = f"{self.base_url}/series/observations"
             params = {
+                **self._base_params,
                 'series_id': series_id,
-                'api_key': self.api_key,
-                'file_type': 'json',
                 'limit': limit,
                 'sort_order': sort_order
             }
             
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
+            # Conditional GET: an unchanged series comes back as an empty 304
+            key = (series_id, limit, sort_order)
+            cached = _load_conditional(key)
+            headers = {}
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+            response = _session.get(self._observations_url, params=params, headers=headers, timeout=30)
+
+            if response.status_code == 304 and cached:
+                logger.info(f"{series_id} not modified, using cached observations")
+                data = cached['data']
+            else:
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                _store_conditional(key, response, data)
             
             if 'observations' in data:
                 logger.info(f"Successfully fetched {len(data['observations'])} observations for {series_id}")
@@ -71,6 +150,12 @@ class FREDClient:
         Returns:
             tuple: (value, date) or (None, None) if error
         """
+        day = datetime.now().date()
+        with _latest_lock:
+            cached = _latest_entries(day).get(series_id)
+        if cached is not None:
+            return cached
+
         try:
             data = self.get_series(series_id, limit=1, sort_order='desc')
             
@@ -86,6 +171,8 @@ class FREDClient:
                     value = None
                 
                 logger.info(f"{series_id}: {value} (as of {date})")
+                with _latest_lock:
+                    _latest_entries(day)[series_id] = (value, date)
                 return value, date
             
             return None, None
@@ -106,9 +193,15 @@ class FREDClient:
             dict: Dictionary with values and dates for each series
         """
         results = {}
-        
-        for name, series_id in series_dict.items():
-            value, date = self.get_latest_value(series_id)
+        if not series_dict:
+            return results
+
+        # I/O-bound fan-out: one request per series, run concurrently
+        workers = min(MAX_WORKERS, len(series_dict))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            latest = executor.map(self.get_latest_value, series_dict.values())
+
+        for (name, series_id), (value, date) in zip(series_dict.items(), latest):
             results[name] = {
                 'value': value,
                 'date': date,
@@ -117,6 +210,32 @@ class FREDClient:
         
         return results
     
+    def get_many_series(self, series_ids, limit=100, sort_order='desc'):
+        """
+        Fetch full observations for several series concurrently
+
+        Args:
+            series_ids: Iterable of FRED series IDs
+            limit: Number of observations per series
+            sort_order: 'asc' or 'desc'
+
+        Returns:
+            dict: {series_id: data}, None for series that failed
+        """
+        series_ids = list(dict.fromkeys(series_ids))
+        if not series_ids:
+            return {}
+
+        def fetch(series_id):
+            try:
+                return self.get_series(series_id, limit=limit, sort_order=sort_order)
+            except Exception:
+                return None  # already logged by get_series
+
+        workers = min(MAX_WORKERS, len(series_ids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(series_ids, executor.map(fetch, series_ids)))
+    
     def get_series_info(self, series_id):
         """
         Get metadata about a series
@@ -125,17 +244,12 @@ class FREDClient:
             dict: Series information (title, units, frequency, etc.)
         """
         try:
-            url = f"{self.base_url}/series"
-            params = {
-                'series_id': series_id,
-                'api_key': self.api_key,
-                'file_type': 'json'
-            }
+            params = {**self._base_params, 'series_id': series_id}
             
-            response = requests.get(url, params=params, timeout=30)
+            response = _session.get(self._series_url, params=params, timeout=30)
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if 'seriess' in data and len(data['seriess']) > 0:
                 return data['seriess'][0]
@@ -194,6 +308,23 @@ MACRO_SERIES = {
 }
 
 
+def observations_frame(data):
+    """
+    Convert a get_series() payload to a DataFrame in one vectorized pass
+
+    Args:
+        data: Response dict with an 'observations' list
+
+    Returns:
+        pandas.DataFrame: 'date' (datetime64) and 'value' (float, NaN for '.')
+    """
+    observations = data['observations']
+    return pd.DataFrame({
+        'date': pd.to_datetime([o['date'] for o in observations], format='%Y-%m-%d'),
+        'value': pd.to_numeric([o['value'] for o in observations], errors='coerce')
+    })
+
+
 def get_macro_indicators():
     """
     Fetch all major macro indicators
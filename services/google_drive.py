@@ -5,41 +5,126 @@ Functions for reading/writing Excel files to/from Google Drive
 
 import os
 import io
+import mmap
+import time
 import logging
+import threading
+import orjson
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from google.oauth2 import service_account
+import httplib2
+import google_auth_httplib2
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+from googleapiclient.http import MediaIoBaseUpload, set_user_agent
 from googleapiclient.errors import HttpError
+from utils.http import create_session
 
 logger = logging.getLogger(__name__)
 
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
+XLSX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+GOOGLE_SHEET_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+
+# Socket timeout for googleapiclient calls (seconds)
+API_TIMEOUT = 60
+
+# Read size when streaming downloads to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Files at least this large are uploaded with the resumable protocol in
+# UPLOAD_CHUNK_SIZE pieces (must be a multiple of 256 KiB)
+RESUMABLE_THRESHOLD = 5 << 20
+UPLOAD_CHUNK_SIZE = 8 << 20
+UPLOAD_RETRIES = 5
+
+# API service objects are reused rather than rebuilt per call. httplib2 is
+# not thread-safe, so each thread keeps its own
+_local = threading.local()
+
+# Media transfers go through one pooled session so back-to-back downloads
+# and uploads reuse the TLS connection to googleapis.com. The bearer token
+# is passed per request since it changes on refresh
+_session = create_session(pool_connections=4, pool_maxsize=16)
+
+# Google APIs only gzip JSON responses when the User-Agent contains "gzip"
+# (plus Accept-Encoding: gzip, which requests and httplib2 already send)
+USER_AGENT = 'trading-system (gzip)'
+_session.headers['User-Agent'] = USER_AGENT
+
+# Resumable upload chunks retry in _upload_resumable, which asks the server
+# how far it got before resending; transport-level retries would bypass that
+_upload_session = create_session(pool_connections=1, pool_maxsize=4, total_retries=0)
+_upload_session.headers['User-Agent'] = USER_AGENT
+
+# Media is xlsx, already zip-compressed: don't ask for gzip on top
+MEDIA_HEADERS = {"Accept-Encoding": "identity"}
+
+# Service account credentials are loaded once per process; the access token
+# is refreshed only when it is missing or about to expire
+TOKEN_REFRESH_MARGIN = timedelta(seconds=120)
+_credentials = None
+_credentials_lock = threading.Lock()
+
+def _token_expiring(credentials):
+    """True when the access token is missing or expires within the margin"""
+    if not credentials.token or credentials.expiry is None:
+        return True
+    # google-auth keeps expiry as a naive UTC datetime
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return credentials.expiry - now < TOKEN_REFRESH_MARGIN
+
 def get_credentials():
-    """Get and refresh service account credentials"""
-    import config
-    credentials = service_account.Credentials.from_service_account_file(
-        config.GOOGLE_SERVICE_ACCOUNT_FILE,
-        scopes=SCOPES
+    """Get service account credentials with a valid access token"""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            import config
+            _credentials = config.load_service_account_credentials().with_scopes(SCOPES)
+        if _token_expiring(_credentials):
+            _credentials.refresh(Request())
+        return _credentials
+
+def _build_service(name, version):
+    """Build an API client over a keep-alive AuthorizedHttp (refreshes tokens itself)"""
+    http = google_auth_httplib2.AuthorizedHttp(
+        get_credentials(),
+        http=httplib2.Http(timeout=API_TIMEOUT)
     )
-    # Refresh credentials to get access token
-    credentials.refresh(Request())
-    return credentials
+    set_user_agent(http, USER_AGENT)
+    # Bundled static discovery doc; skip the on-disk discovery cache
+    return build(name, version, http=http, cache_discovery=False, static_discovery=True)
 
 def get_drive_service():
     """
-    Create and return Google Drive service object
+    Return the Google Drive service object (built once per thread)
     """
-    try:
-        credentials = get_credentials()
-        service = build('drive', 'v3', credentials=credentials)
-        logger.info("Google Drive service created successfully")
-        return service
-    except Exception as e:
-        logger.error(f"Failed to create Google Drive service: {e}")
-        raise
+    service = getattr(_local, 'drive', None)
+    if service is None:
+        try:
+            service = _local.drive = _build_service('drive', 'v3')
+            logger.info("Google Drive service created successfully")
+        except Exception as e:
+            logger.error(f"Failed to create Google Drive service: {e}")
+            raise
+    return service
+
+def get_sheets_service():
+    """
+    Return the Google Sheets API service object (built once per thread)
+    """
+    service = getattr(_local, 'sheets', None)
+    if service is None:
+        try:
+            service = _local.sheets = _build_service('sheets', 'v4')
+            logger.info("Google Sheets service created successfully")
+        except Exception as e:
+            logger.error(f"Failed to create Google Sheets service: {e}")
+            raise
+    return service
 
 def test_drive_connection():
     """Test Google Drive connection"""
@@ -56,25 +141,50 @@ def test_drive_connection():
         logger.error(error_msg)
         return False, error_msg
 
-def list_files_in_folder(folder_id, file_type=None):
-    """List all files in a Google Drive folder"""
+def _q(value):
+    """Escape a value for use inside a single-quoted Drive query string"""
+    return str(value).replace('\\', '\\\\').replace("'", "\\'")
+
+# Largest page files.list will return
+LIST_PAGE_SIZE = 1000
+
+def _list_folder(folder_id, file_type, file_fields):
+    """All files in a folder, following nextPageToken"""
     try:
         service = get_drive_service()
-        query = f"'{folder_id}' in parents and trashed=false"
+        query = f"'{_q(folder_id)}' in parents and trashed=false"
         if file_type:
-            query += f" and mimeType='{file_type}'"
-        results = service.files().list(
-            q=query,
-            fields="files(id, name, mimeType, modifiedTime, size)",
-            orderBy="name"
-        ).execute()
-        files = results.get('files', [])
+            query += f" and mimeType='{_q(file_type)}'"
+
+        files = []
+        page_token = None
+        while True:
+            results = service.files().list(
+                q=query,
+                fields=f"nextPageToken, files({file_fields})",
+                orderBy="name",
+                pageSize=LIST_PAGE_SIZE,
+                pageToken=page_token
+            ).execute()
+            files.extend(results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+
         logger.info(f"Found {len(files)} files in folder {folder_id}")
         return files
     except HttpError as e:
         logger.error(f"Error listing folder {folder_id}: {e}")
         raise
 
+def list_files_in_folder(folder_id, file_type=None):
+    """List all files in a Google Drive folder (id, name, mimeType)"""
+    return _list_folder(folder_id, file_type, "id, name, mimeType")
+
+def list_files_full(folder_id, file_type=None):
+    """List all files in a Google Drive folder, including modifiedTime and size"""
+    return _list_folder(folder_id, file_type, "id, name, mimeType, modifiedTime, size")
+
 def download_file_as_bytes(file_id):
     """
     Download file from Google Drive using requests library
@@ -87,9 +197,9 @@ def download_file_as_bytes(file_id):
 
         # Use requests library for download (better SSL support)
         url = f"https://www.googleapis.com/drive/v3/files/{file_id}?alt=media"
-        headers = {"Authorization": f"Bearer {access_token}"}
+        headers = {**MEDIA_HEADERS, "Authorization": f"Bearer {access_token}"}
 
-        response = requests.get(
+        response = _session.get(
             url,
             headers=headers,
             timeout=60,
@@ -105,22 +215,64 @@ def download_file_as_bytes(file_id):
         logger.error(f"Error downloading file {file_id}: {e}")
         raise
 
+def prefetch_files(file_ids, ahead=3):
+    """
+    Download files in background threads, handing them out in order
+
+    While the caller parses one file the next `ahead` are already
+    downloading, so network time overlaps with parse time. At most
+    `ahead` + 1 files are held in memory.
+
+    Yields:
+        tuple: (file_id, Future) - future.result() returns the bytes or raises
+    """
+    file_ids = iter(file_ids)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=ahead) as executor:
+        for file_id in file_ids:
+            pending.append((file_id, executor.submit(download_file_as_bytes, file_id)))
+            if len(pending) > ahead:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+# Directories download_file has already created or found
+_ensured_dirs = set()
+
+def download_file_to_path(file_id, local_path):
+    """
+    Stream a Drive file to disk in 1 MiB chunks (never held whole in memory)
+
+    Returns:
+        int: Number of bytes written
+    """
+    credentials = get_credentials()
+    url = f"https://www.googleapis.com/drive/v3/files/{file_id}?alt=media"
+    headers = {**MEDIA_HEADERS, "Authorization": f"Bearer {credentials.token}"}
+
+    written = 0
+    with _session.get(url, headers=headers, timeout=60, stream=True) as response:
+        response.raise_for_status()
+        with open(local_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                written += len(chunk)
+    return written
+
 def download_file(file_id, local_path):
     """
     Download file from Google Drive to local path
     """
     try:
-        content = download_file_as_bytes(file_id)
-
-        # Ensure directory exists
+        # Ensure directory exists (once per directory per process)
         dir_path = os.path.dirname(local_path)
-        if dir_path:
+        if dir_path and dir_path not in _ensured_dirs:
             os.makedirs(dir_path, exist_ok=True)
+            _ensured_dirs.add(dir_path)
 
-        with open(local_path, 'wb') as f:
-            f.write(content)
+        size = download_file_to_path(file_id, local_path)
 
-        logger.info(f"File {file_id} saved to {local_path}")
+        logger.info(f"File {file_id} saved to {local_path} ({size} bytes)")
         return local_path
 
     except Exception as e:
@@ -131,26 +283,163 @@ def upload_file(local_path, file_id=None, folder_id=None, file_name=None):
     """
     Upload file to Google Drive using requests library
     """
+    if not file_name:
+        file_name = os.path.basename(local_path)
+
+    mime_type = 'application/octet-stream'
+    if local_path.endswith('.xlsx') or local_path.endswith('.xlsm'):
+        mime_type = XLSX_MIME_TYPE
+
+    if os.path.getsize(local_path) >= RESUMABLE_THRESHOLD:
+        return _upload_resumable(
+            local_path,
+            file_id=file_id,
+            folder_id=folder_id,
+            file_name=file_name,
+            mime_type=mime_type
+        )
+
+    # The open file is streamed into the request, never read whole
+    with open(local_path, 'rb') as f:
+        return upload_bytes(
+            f,
+            file_id=file_id,
+            folder_id=folder_id,
+            file_name=file_name,
+            mime_type=mime_type
+        )
+
+def _content_length(file_content):
+    """Bytes left to send from a bytes-like object or a binary file"""
+    if hasattr(file_content, 'read'):
+        return os.fstat(file_content.fileno()).st_size - file_content.tell()
+    return len(file_content)
+
+def _multipart_body(preamble, file_content, epilogue):
+    """Yield a multipart body piecewise so the content is never copied into one buffer"""
+    yield preamble
+    if hasattr(file_content, 'read'):
+        while chunk := file_content.read(DOWNLOAD_CHUNK_SIZE):
+            yield chunk
+    else:
+        yield file_content
+    yield epilogue
+
+def _upload_resumable(local_path, file_id=None, folder_id=None, file_name=None,
+                      mime_type='application/octet-stream'):
+    """
+    Upload a large file with Drive's resumable protocol
+
+    The file is memory-mapped and sent in UPLOAD_CHUNK_SIZE pieces, so only
+    one chunk is in memory at a time. After a dropped connection or a 5xx
+    the server is asked how many bytes it committed and the upload resumes
+    from there instead of starting over.
+    """
     try:
-        credentials = get_credentials()
-        access_token = credentials.token
+        total = os.path.getsize(local_path)
+        headers = {"Authorization": f"Bearer {get_credentials().token}"}
+
+        # Open the upload session (metadata only) and get its URI
+        session_headers = {
+            **headers,
+            "X-Upload-Content-Type": mime_type,
+            "X-Upload-Content-Length": str(total),
+            "Content-Type": "application/json; charset=UTF-8"
+        }
+        if file_id:
+            response = _session.patch(
+                f"https://www.googleapis.com/upload/drive/v3/files/{file_id}"
+                "?uploadType=resumable&supportsAllDrives=true",
+                headers=session_headers,
+                data=b'{}',
+                timeout=60
+            )
+        else:
+            metadata = {"name": file_name}
+            if folder_id:
+                metadata["parents"] = [folder_id]
+            response = _session.post(
+                "https://www.googleapis.com/upload/drive/v3/files"
+                "?uploadType=resumable&supportsAllDrives=true",
+                headers=session_headers,
+                data=orjson.dumps(metadata),
+                timeout=60
+            )
+        response.raise_for_status()
+        session_uri = response.headers['Location']
+
+        with open(local_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            failures = 0
+            resume = False
+            while True:
+                end = min(offset + UPLOAD_CHUNK_SIZE, total)
+                try:
+                    if resume:
+                        # Ask how far the server got
+                        response = _upload_session.put(
+                            session_uri,
+                            headers={**headers, "Content-Range": f"bytes */{total}"},
+                            timeout=60,
+                            allow_redirects=False
+                        )
+                    else:
+                        response = _upload_session.put(
+                            session_uri,
+                            headers={**headers, "Content-Range": f"bytes {offset}-{end - 1}/{total}"},
+                            data=data[offset:end],
+                            timeout=120,
+                            allow_redirects=False
+                        )
+                except requests.RequestException as e:
+                    logger.warning(f"Upload of {local_path} interrupted at byte {offset}: {e}")
+                    response = None
+
+                if response is None or response.status_code >= 500:
+                    failures += 1
+                    if failures > UPLOAD_RETRIES:
+                        raise RuntimeError(f"Resumable upload of {local_path} failed after {UPLOAD_RETRIES} retries")
+                    time.sleep(0.5 * 2 ** failures)
+                    resume = True
+                    continue
+                resume = False
 
-        if not file_name:
-            file_name = os.path.basename(local_path)
+                if response.status_code in (200, 201):
+                    result = orjson.loads(response.content)
+                    logger.info(f"File {result.get('id', file_id)} uploaded ({total} bytes, resumable)")
+                    return result
+                if response.status_code != 308:
+                    response.raise_for_status()
 
-        mime_type = 'application/octet-stream'
-        if local_path.endswith('.xlsx') or local_path.endswith('.xlsm'):
-            mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                # 308 Resume Incomplete: Range is the committed prefix, e.g. "bytes=0-8388607"
+                committed = response.headers.get('Range')
+                offset = int(committed.rsplit('-', 1)[1]) + 1 if committed else 0
 
-        with open(local_path, 'rb') as f:
-            file_content = f.read()
+    except Exception as e:
+        logger.error(f"Error uploading file {local_path}: {e}")
+        raise
+
+def upload_bytes(file_content, file_id=None, folder_id=None, file_name=None,
+                 mime_type='application/octet-stream'):
+    """
+    Upload content to Google Drive using requests library
+    (updates file_id if given, otherwise creates file_name in folder_id)
+
+    file_content is bytes or an open binary file, which is streamed.
+    Updates go out as a single simple-upload PATCH: the bytes are sent
+    exactly as given, with no resumable session or re-encoding.
+    """
+    try:
+        credentials = get_credentials()
+        access_token = credentials.token
 
         headers = {"Authorization": f"Bearer {access_token}"}
 
         if file_id:
             # Update existing file
-            url = f"https://www.googleapis.com/upload/drive/v3/files/{file_id}?uploadType=media"
-            response = requests.patch(
+            url = f"https://www.googleapis.com/upload/drive/v3/files/{file_id}?uploadType=media&supportsAllDrives=true"
+            response = _session.patch(
                 url,
                 headers={**headers, "Content-Type": mime_type},
                 data=file_content,
@@ -158,36 +447,39 @@ def upload_file(local_path, file_id=None, folder_id=None, file_name=None):
             )
             response.raise_for_status()
             logger.info(f"File {file_id} updated successfully")
-            return response.json()
+            return orjson.loads(response.content)
         else:
             # Create new file - metadata first
-            import json
             metadata = {"name": file_name}
             if folder_id:
                 metadata["parents"] = [folder_id]
 
             # Multipart upload
             boundary = "boundary_trading_system"
-            body = (
-                f"--{boundary}\r\n"
-                f"Content-Type: application/json\r\n\r\n"
-                f"{json.dumps(metadata)}\r\n"
+            preamble = (
                 f"--{boundary}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+            ).encode() + orjson.dumps(metadata) + (
+                f"\r\n--{boundary}\r\n"
                 f"Content-Type: {mime_type}\r\n\r\n"
-            ).encode() + file_content + f"\r\n--{boundary}--".encode()
+            ).encode()
+            epilogue = f"\r\n--{boundary}--".encode()
+            length = len(preamble) + _content_length(file_content) + len(epilogue)
 
-            url = "https://www.googleapis.com/upload/drive/v3/files?uploadType=multipart"
-            response = requests.post(
+            url = "https://www.googleapis.com/upload/drive/v3/files?uploadType=multipart&supportsAllDrives=true"
+            response = _session.post(
                 url,
                 headers={
                     **headers,
-                    "Content-Type": f"multipart/related; boundary={boundary}"
+                    "Content-Type": f"multipart/related; boundary={boundary}",
+                    # Known up front, so the generator body is not sent chunked
+                    "Content-Length": str(length)
                 },
-                data=body,
+                data=_multipart_body(preamble, file_content, epilogue),
                 timeout=120
             )
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             logger.info(f"File created: {result.get('id')}")
             return result
 
@@ -199,9 +491,9 @@ def find_file_by_name(file_name, folder_id=None):
     """Find file ID by name"""
     try:
         service = get_drive_service()
-        query = f"name='{file_name}' and trashed=false"
+        query = f"name='{_q(file_name)}' and trashed=false"
         if folder_id:
-            query += f" and '{folder_id}' in parents"
+            query += f" and '{_q(folder_id)}' in parents"
         results = service.files().list(
             q=query,
             fields="files(id, name)",
@@ -227,6 +519,59 @@ def get_file_metadata(file_id):
         logger.error(f"Error getting file metadata: {e}")
         raise
 
+REVISION_FIELDS = "headRevisionId, md5Checksum, modifiedTime"
+
+# Drive accepts at most this many calls in one batch request
+BATCH_LIMIT = 100
+
+def _revision_of(meta):
+    return meta.get('headRevisionId') or meta.get('md5Checksum') or meta.get('modifiedTime')
+
+def get_file_revision(file_id):
+    """
+    Get a cheap content version for a file (changes whenever its content does)
+    """
+    try:
+        service = get_drive_service()
+        meta = service.files().get(fileId=file_id, fields=REVISION_FIELDS).execute()
+        return _revision_of(meta)
+    except HttpError as e:
+        logger.error(f"Error getting revision for {file_id}: {e}")
+        raise
+
+def get_file_revisions(file_ids):
+    """
+    Revisions for several files via Drive batch requests (one HTTP call per 100)
+
+    Returns:
+        dict: file_id -> revision (files whose lookup failed are omitted)
+    """
+    service = get_drive_service()
+    file_ids = list(dict.fromkeys(file_ids))
+    revisions = {}
+
+    def collect(request_id, meta, exception):
+        if exception is not None:
+            logger.warning(f"Error getting revision for {request_id}: {exception}")
+        else:
+            revisions[request_id] = _revision_of(meta)
+
+    for start in range(0, len(file_ids), BATCH_LIMIT):
+        batch = service.new_batch_http_request(callback=collect)
+        for file_id in file_ids[start:start + BATCH_LIMIT]:
+            batch.add(service.files().get(fileId=file_id, fields=REVISION_FIELDS), request_id=file_id)
+        batch.execute()
+    return revisions
+
+def get_mime_type(file_id):
+    """Get just the mimeType of a file"""
+    try:
+        service = get_drive_service()
+        return service.files().get(fileId=file_id, fields="mimeType").execute()['mimeType']
+    except HttpError as e:
+        logger.error(f"Error getting mime type for {file_id}: {e}")
+        raise
+
 def create_folder(folder_name, parent_folder_id=None):
     """Create a new folder in Google Drive"""
     try:
@@ -4,36 +4,120 @@ Macro Regime Analysis Engine
 Determines current macroeconomic regime and recommends sector positioning
 """
 
-import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Regime to sector mappings
-REGIME_TO_LONGS = {
-    'EXPANSION': ['Financials', 'Industrials', 'Technology', 'Consumer Discretionary'],
-    'LATE_CYCLE': ['Energy', 'Materials', 'Financials'],
-    'RECESSION': ['Utilities', 'Consumer Staples', 'Health Care'],
-    'RECOVERY': ['Financials', 'Industrials', 'Technology', 'Materials']
-}
 
-REGIME_TO_SHORTS = {
-    'EXPANSION': ['Utilities', 'Consumer Staples'],
-    'LATE_CYCLE': ['Technology', 'Consumer Discretionary', 'Industrials'],
-    'RECESSION': ['Financials', 'Industrials', 'Consumer Discretionary', 'Energy'],
-    'RECOVERY': ['Utilities', 'Consumer Staples']
-}
+class Regime(IntEnum):
+    """Macro regimes; values index the tables and score arrays below"""
+    EXPANSION = 0
+    LATE_CYCLE = 1
+    RECESSION = 2
+    RECOVERY = 3
 
-# Indicator weights
-WEIGHTS = {
-    'yield_curve': 0.30,
-    'ism': 0.25,
-    'credit_spread': 0.20,
-    'sentiment': 0.15,
-    'permits': 0.05,
-    'claims': 0.05
-}
+
+class Indicator(IntEnum):
+    """Scored indicators; name.lower() is the key in the indicators dict"""
+    YIELD_CURVE = 0
+    ISM = 1
+    CREDIT_SPREAD = 2
+    SENTIMENT = 3
+    PERMITS = 4
+    CLAIMS = 5
+
+
+# Regime to sector mappings (indexed by Regime)
+REGIME_TO_LONGS = (
+    ('Financials', 'Industrials', 'Technology', 'Consumer Discretionary'),  # EXPANSION
+    ('Energy', 'Materials', 'Financials'),  # LATE_CYCLE
+    ('Utilities', 'Consumer Staples', 'Health Care'),  # RECESSION
+    ('Financials', 'Industrials', 'Technology', 'Materials'),  # RECOVERY
+)
+
+REGIME_TO_SHORTS = (
+    ('Utilities', 'Consumer Staples'),  # EXPANSION
+    ('Technology', 'Consumer Discretionary', 'Industrials'),  # LATE_CYCLE
+    ('Financials', 'Industrials', 'Consumer Discretionary', 'Energy'),  # RECESSION
+    ('Utilities', 'Consumer Staples'),  # RECOVERY
+)
+
+# Drive files backing the indicators
+YIELD_CURVE_FILE_ID = '1I3f36ghjh-NpI_EyhlZ9JTNUnGIWDkg4'
+UMCSI_FILE_ID = '18ExFmLHORm7boVpCzmNR7AZYK5RQ68-T'
+
+# Indicator weights (indexed by Indicator)
+WEIGHTS = np.array([
+    0.30,  # YIELD_CURVE
+    0.25,  # ISM
+    0.20,  # CREDIT_SPREAD
+    0.15,  # SENTIMENT
+    0.05,  # PERMITS
+    0.05,  # CLAIMS
+])
+
+# Keys of the indicators dict, in Indicator order
+INDICATOR_KEYS = tuple(ind.name.lower() for ind in Indicator)
+
+
+def _as_float(value):
+    """Cell value as float (NaN for blanks and text)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+# With fewer non-zero signals than this the scores are noise around 0.5,
+# so no regime is called
+MIN_ACTIVE_INDICATORS = 2
+
+
+def _regime_multipliers():
+    """
+    How each regime reads each indicator's signal
+    Returns: (positive, negative) arrays of shape (regime, indicator),
+    applied to the positive and negative part of the signal respectively
+    """
+    positive = np.ones((len(Regime), len(Indicator)))
+    negative = np.ones((len(Regime), len(Indicator)))
+    
+    # EXPANSION: all positive signals support expansion (rows stay 1)
+    
+    # LATE_CYCLE: mixed - signals count half, but a flattening yield curve
+    # (negative signal) supports late cycle outright
+    positive[Regime.LATE_CYCLE] = negative[Regime.LATE_CYCLE] = 0.5
+    negative[Regime.LATE_CYCLE, Indicator.YIELD_CURVE] = -1.0
+    
+    # RECESSION: negative signals support recession
+    positive[Regime.RECESSION] = negative[Regime.RECESSION] = -1.0
+    
+    # RECOVERY: rising sentiment / permits from low levels weigh 1.5x
+    positive[Regime.RECOVERY, [Indicator.SENTIMENT, Indicator.PERMITS]] = 1.5
+    
+    return positive, negative
+
+
+_POSITIVE_MULT, _NEGATIVE_MULT = _regime_multipliers()
+
+
+def _score_all(signals):
+    """
+    Confidence (0.0 to 1.0) of every regime
+    
+    signals is one vector indexed by Indicator, or a (dates, indicators)
+    matrix to score a whole history in one call; the result has a trailing
+    regime axis indexed by Regime
+    """
+    signals = np.asarray(signals, dtype=float)
+    raw = ((np.maximum(signals, 0) * WEIGHTS) @ _POSITIVE_MULT.T
+           + (np.minimum(signals, 0) * WEIGHTS) @ _NEGATIVE_MULT.T)
+    # Convert from -2 to +2 range to 0-1
+    return np.clip((raw + 2.0) / 4.0, 0.0, 1.0)
 
 
 class MacroAnalyzer:
@@ -42,6 +126,8 @@ class MacroAnalyzer:
     def __init__(self, excel_handler, google_drive):
         self.excel = excel_handler
         self.drive = google_drive
+        # File revisions fetched up front in one batch call (see analyze_regime)
+        self.revisions = {}
         
     def get_yield_curve_spread(self):
         """
@@ -49,43 +135,31 @@ class MacroAnalyzer:
         Returns: (spread_value, trend, signal)
         """
         try:
-            file_id = '1I3f36ghjh-NpI_EyhlZ9JTNUnGIWDkg4'
-            df = self.excel.read_sheet(file_id, 'Data', rows=10)
-            
-            if df.empty:
-                return None, None, 0
-            
-            # Get most recent data (row 4)
-            latest = df.iloc[0]
-            yr10 = float(latest['K']) if 'K' in latest and latest['K'] else None
-            yr2 = float(latest['G']) if 'G' in latest and latest['G'] else None
+            # 10yr (K) and 2yr (G) yields of the two most recent rows (row 4
+            # first); blanks and non-numeric cells become NaN
+            yr10, yr2, prev_yr10, prev_yr2 = map(_as_float, self.excel.read_cells(
+                YIELD_CURVE_FILE_ID, 'Data', ('K4', 'G4', 'K5', 'G5'),
+                revision=self.revisions.get(YIELD_CURVE_FILE_ID)
+            ))
             
-            if yr10 is None or yr2 is None:
+            if np.isnan(yr10) or np.isnan(yr2):
                 return None, None, 0
             
             spread = yr10 - yr2
             
             # Get previous spread to determine trend
-            if len(df) > 1:
-                prev = df.iloc[1]
-                prev_yr10 = float(prev['K']) if 'K' in prev and prev['K'] else yr10
-                prev_yr2 = float(prev['G']) if 'G' in prev and prev['G'] else yr2
+            if not (np.isnan(prev_yr10) and np.isnan(prev_yr2)):
+                prev_yr10 = yr10 if np.isnan(prev_yr10) else prev_yr10
+                prev_yr2 = yr2 if np.isnan(prev_yr2) else prev_yr2
                 prev_spread = prev_yr10 - prev_yr2
                 trend = 'STEEPENING' if spread > prev_spread else 'FLATTENING'
             else:
                 trend = 'STABLE'
             
-            # Determine signal
-            if spread > 1.0 and trend == 'STEEPENING':
-                signal = 2  # Strong expansion
-            elif spread > 0.5:
-                signal = 1  # Moderate expansion
-            elif spread < 0:
-                signal = -2  # Inverted = recession warning
-            elif spread < 0.3:
-                signal = -1  # Flattening = late cycle
-            else:
-                signal = 0
+            # Determine signal: -2 inverted (recession warning), -1 flat
+            # (late cycle), 0 neutral, +1 moderate, +2 steep and steepening
+            signal = (-2 + (spread >= 0) + (spread >= 0.3) + (spread > 0.5)
+                      + (spread > 1.0 and trend == 'STEEPENING'))
             
             return spread, trend, signal
             
@@ -114,38 +188,26 @@ class MacroAnalyzer:
         Returns: (value, trend, signal)
         """
         try:
-            file_id = '18ExFmLHORm7boVpCzmNR7AZYK5RQ68-T'
-            df = self.excel.read_sheet(file_id, 'UMCSI_VS_SP500', rows=5)
-            
-            if df.empty:
-                return None, None, 0
-            
-            # Get latest value (row 2)
-            latest = df.iloc[0]
-            value = float(latest['B']) if 'B' in latest and latest['B'] else None
+            # Latest two values (row 2 first); blanks become NaN
+            value, prev_value = map(_as_float, self.excel.read_cells(
+                UMCSI_FILE_ID, 'UMCSI_VS_SP500', ('B2', 'B3'),
+                revision=self.revisions.get(UMCSI_FILE_ID)
+            ))
             
-            if value is None:
+            if np.isnan(value):
                 return None, None, 0
             
             # Determine trend
-            if len(df) > 1:
-                prev = df.iloc[1]
-                prev_value = float(prev['B']) if 'B' in prev and prev['B'] else value
+            if not np.isnan(prev_value):
                 trend = 'RISING' if value > prev_value else 'FALLING'
             else:
                 trend = 'STABLE'
             
-            # Determine signal
-            if value > 90 and trend == 'RISING':
-                signal = 2  # Strong expansion
-            elif value > 80:
-                signal = 1  # Moderate
-            elif value < 70:
-                signal = -2  # Recession
-            elif value < 80 and trend == 'FALLING':
-                signal = -1  # Late cycle
-            else:
-                signal = 0
+            # Determine signal: -2 recession below 70, -1 falling in the
+            # 70s (late cycle), +1 above 80, +2 above 90 and rising
+            signal = (-2 * (value < 70) + (value > 80)
+                      + (value > 90 and trend == 'RISING')
+                      - (70 <= value < 80 and trend == 'FALLING'))
             
             return value, trend, signal
             
@@ -153,55 +215,24 @@ class MacroAnalyzer:
             logger.error(f"Error getting sentiment: {e}")
             return None, None, 0
     
-    def score_regime(self, regime, indicators):
+    def score_regimes(self, indicators):
         """
-        Score how well indicators match a specific regime
-        Returns: confidence score (0.0 to 1.0)
+        Score how well indicators match every regime
+        Returns: {regime: confidence score (0.0 to 1.0)}
         """
-        score = 0.0
-        
-        # Weighted scoring based on each indicator
-        for indicator, weight in WEIGHTS.items():
-            if indicator in indicators and indicators[indicator]['signal'] is not None:
-                signal = indicators[indicator]['signal']
-                
-                # Adjust signal based on regime expectations
-                regime_score = self._get_regime_specific_score(regime, indicator, signal)
-                score += regime_score * weight
-        
-        # Normalize to 0-1 range
-        normalized = (score + 2.0) / 4.0  # Convert from -2 to +2 range to 0-1
-        return max(0.0, min(1.0, normalized))
+        # Missing indicators contribute nothing
+        signals = np.array([
+            (indicators.get(name) or {}).get('signal') or 0
+            for name in INDICATOR_KEYS
+        ], dtype=float)
+        return {regime.name: score for regime, score in zip(Regime, _score_all(signals).tolist())}
     
-    def _get_regime_specific_score(self, regime, indicator, signal):
+    def score_regime(self, regime, indicators):
         """
-        Adjust indicator signal based on what each regime expects
+        Score how well indicators match a specific regime
+        Returns: confidence score (0.0 to 1.0)
         """
-        # Positive signal = matches regime, negative = contradicts
-        
-        if regime == 'EXPANSION':
-            # All positive signals support expansion
-            return signal
-        
-        elif regime == 'LATE_CYCLE':
-            # Mixed signals - some positive (economy still growing), some negative (slowing)
-            if indicator == 'yield_curve' and signal < 0:
-                return abs(signal)  # Flattening supports late cycle
-            elif indicator in ['ism', 'sentiment'] and signal > 0:
-                return signal * 0.5  # Still positive but weakening
-            return signal * 0.5
-        
-        elif regime == 'RECESSION':
-            # Negative signals support recession
-            return -signal  # Invert (negative becomes positive)
-        
-        elif regime == 'RECOVERY':
-            # Early positive signals from low levels
-            if indicator in ['sentiment', 'permits'] and signal > 0:
-                return signal * 1.5  # Rising from lows very positive
-            return signal
-        
-        return 0
+        return self.score_regimes(indicators)[regime]
     
     def analyze_regime(self):
         """
@@ -211,11 +242,24 @@ class MacroAnalyzer:
         try:
             logger.info("Starting macro regime analysis...")
             
-            # 1. Collect all indicators
+            # Validate every indicator file's cache entry in one batch request
+            try:
+                self.revisions = self.drive.get_file_revisions([YIELD_CURVE_FILE_ID, UMCSI_FILE_ID])
+            except Exception as e:
+                logger.warning(f"Batch revision lookup failed, checking files individually: {e}")
+                self.revisions = {}
+            
+            # 1. Collect all indicators - each getter is an independent
+            # Drive read, so run them concurrently
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                yield_curve = executor.submit(self.get_yield_curve_spread)
+                ism_value = executor.submit(self.get_ism_value)
+                sentiment = executor.submit(self.get_consumer_sentiment)
+            
             indicators = {}
             
             # Yield curve
-            spread, trend, signal = self.get_yield_curve_spread()
+            spread, trend, signal = yield_curve.result()
             indicators['yield_curve'] = {
                 'value': spread,
                 'trend': trend,
@@ -224,7 +268,7 @@ class MacroAnalyzer:
             }
             
             # ISM
-            ism, ism_trend, ism_signal = self.get_ism_value()
+            ism, ism_trend, ism_signal = ism_value.result()
             indicators['ism'] = {
                 'value': ism,
                 'trend': ism_trend,
@@ -233,7 +277,7 @@ class MacroAnalyzer:
             }
             
             # Consumer Sentiment
-            sent, sent_trend, sent_signal = self.get_consumer_sentiment()
+            sent, sent_trend, sent_signal = sentiment.result()
             indicators['sentiment'] = {
                 'value': sent,
                 'trend': sent_trend,
@@ -246,21 +290,29 @@ class MacroAnalyzer:
             indicators['permits'] = {'value': None, 'trend': None, 'signal': 0, 'description': 'N/A'}
             indicators['claims'] = {'value': None, 'trend': None, 'signal': 0, 'description': 'N/A'}
             
+            active = sum(1 for v in indicators.values() if v['signal'])
+            if active < MIN_ACTIVE_INDICATORS:
+                logger.warning(f"Only {active} indicator(s) with a signal - regime unknown")
+                return {
+                    'regime': 'UNKNOWN',
+                    'confidence': 0.0,
+                    'long_sectors': [],
+                    'short_sectors': [],
+                    'scores': {},
+                    'indicators': indicators,
+                    'timestamp': datetime.now().isoformat()
+                }
+            
             # 2. Score each regime
-            scores = {
-                'EXPANSION': self.score_regime('EXPANSION', indicators),
-                'LATE_CYCLE': self.score_regime('LATE_CYCLE', indicators),
-                'RECESSION': self.score_regime('RECESSION', indicators),
-                'RECOVERY': self.score_regime('RECOVERY', indicators)
-            }
+            scores = self.score_regimes(indicators)
             
             # 3. Determine regime (highest score)
             regime = max(scores, key=scores.get)
             confidence = scores[regime]
             
             # 4. Get sector recommendations
-            long_sectors = REGIME_TO_LONGS[regime]
-            short_sectors = REGIME_TO_SHORTS[regime]
+            long_sectors = list(REGIME_TO_LONGS[Regime[regime]])
+            short_sectors = list(REGIME_TO_SHORTS[Regime[regime]])
             
             result = {
                 'regime': regime,
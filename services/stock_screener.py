@@ -4,39 +4,351 @@ Stock Fundamental Screening System
 Uses Alpha Vantage API to fetch fundamentals and screen for longs/shorts
 """
 
-import requests
-import pandas as pd
+import functools
+import itertools
+import operator
+import orjson
+import numpy as np
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
 import time
+from utils.rate_limiter import RateLimiter
+from utils.redis_client import get_redis
+from utils.http import create_session
 
 logger = logging.getLogger(__name__)
 
+# Concurrent OVERVIEW requests; the rate limiter decides how fast they go out
+MAX_WORKERS = 8
+
+# One pooled session per process: screener instances are created per
+# request, the keep-alive connection to alphavantage.co outlives them.
+# 429 is left out of the transport retries: _request handles it through the
+# rate limiter instead of urllib3 re-sending outside the token bucket
+_session = create_session(pool_connections=4, pool_maxsize=MAX_WORKERS,
+                          status_forcelist=(500, 502, 503, 504))
+
+# Fundamentals move with quarterly filings, so parsed overviews are cached
+# in Redis (when configured) for a quarter, one JSON value per ticker
+OVERVIEW_CACHE_TTL = 90 * 86400
+OVERVIEW_CACHE_KEY = 'av:overview:{}'
+
+# Overviews that came with an ETag / Last-Modified are kept this much
+# longer once stale, so their refresh can be a conditional GET (304, no body)
+OVERVIEW_REVALIDATE_TTL = 30 * 86400
+
+# Market caps drift with price, so they are cached for a week; shares
+# outstanding only change with filings and live as long as the overview.
+# Together they let small caps be dropped before any OVERVIEW call
+MCAP_CACHE_TTL = 7 * 86400
+MCAP_CACHE_KEY = 'av:mcap:{}'
+SHARES_CACHE_KEY = 'av:shares:{}'
+
+# Symbols OVERVIEW has no data for (delisted / unsupported) are skipped
+# for a week instead of spending a rate-limit slot on every screen
+NACK_CACHE_TTL = 7 * 86400
+NACK_CACHE_KEY = 'av:nack:{}'
+
+# Screening rules: criterion -> (overview field, test against the threshold).
+# A missing (None) value fails every test
+CRITERIA_FIELDS = {
+    'min_price': ('price', operator.ge),
+    'max_price': ('price', operator.le),
+    'min_market_cap': ('market_cap', operator.ge),
+    'min_revenue_growth': ('revenue_growth_yoy', operator.ge),
+    'min_eps_growth': ('eps_growth_yoy', operator.ge),
+    'min_roe': ('roe', operator.ge),
+    'max_peg': ('peg_ratio', operator.le),
+    'min_pe': ('pe_ratio', operator.ge),
+    'max_pe': ('pe_ratio', operator.le),
+}
+
+# Retries after a throttle response; the limiter halves its rate each time
+THROTTLE_RETRIES = 3
+
+# Long candidates (growth, quality) - from Professional Trading Masterclass
+LONG_CRITERIA = {
+    'min_price': 5,  # No penny stocks
+    'min_market_cap': 1_000_000_000,  # $1B
+    'min_revenue_growth': 10,  # 10%
+    'min_eps_growth': 20,  # 20%
+    'min_roe': 15,  # 15%
+    'max_peg': 1.5
+}
+
+# Short candidates (weakness, overvaluation)
+SHORT_CRITERIA = {
+    'min_price': 5,  # Sub-$5 names are hard to borrow
+    'min_market_cap': 1_000_000_000,  # $1B for liquidity
+    'max_revenue_growth': 5,  # Weak growth
+    'max_eps_growth': 5,  # Weak earnings
+    'max_roe': 10,  # Poor returns
+    'min_pe': 25  # Expensive
+}
+
+# Log fetch progress every this many overviews
+HEARTBEAT = 5
+
+# Symbols per REALTIME_BULK_QUOTES request
+BULK_QUOTE_LIMIT = 100
+
+
+# The Alpha Vantage budget belongs to the API key, not to a screener
+# instance, so every screener in the process using a key draws from one
+# limiter. The first screener for a key sets its rate
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def _shared_limiter(api_key, calls_per_minute):
+    with _limiters_lock:
+        limiter = _limiters.get(api_key)
+        if limiter is None:
+            limiter = _limiters[api_key] = RateLimiter(calls_per_minute, per=60)
+        elif limiter.base_interval != 60 / calls_per_minute:
+            logger.warning(f"Alpha Vantage key already limited to {60 / limiter.base_interval:g} calls/min, "
+                           f"ignoring {calls_per_minute}")
+        return limiter
+
+
+def _percent(value):
+    return float(value) * 100
+
+
+# Numeric OVERVIEW fields: (overview key, Alpha Vantage key, transform, default)
+OVERVIEW_FIELDS = (
+    ('market_cap', 'MarketCapitalization', float, 0.0),
+    ('pe_ratio', 'PERatio', float, None),
+    ('peg_ratio', 'PEGRatio', float, None),
+    ('roe', 'ReturnOnEquityTTM', _percent, None),
+    ('eps', 'EPS', float, None),
+    ('revenue_per_share', 'RevenuePerShareTTM', float, None),
+    ('profit_margin', 'ProfitMargin', _percent, None),
+    ('operating_margin', 'OperatingMarginTTM', _percent, None),
+    ('revenue_growth_yoy', 'QuarterlyRevenueGrowthYOY', _percent, None),
+    ('eps_growth_yoy', 'QuarterlyEarningsGrowthYOY', _percent, None),
+    ('beta', 'Beta', float, 1.0),
+    ('price', '50DayMovingAverage', float, None),
+)
+
+# How Alpha Vantage spells "no value"
+MISSING_VALUES = frozenset((None, 'None', '-', ''))
+
+class StaleOverview(Exception):
+    """Carries an expired cached overview used because its refresh failed"""
+    
+    def __init__(self, overview):
+        super().__init__(overview['ticker'])
+        self.overview = overview
+
+
+def _to_float(value):
+    """Alpha Vantage number string -> float (None for blanks / 'None')"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _criteria_rules(criteria):
+    """Criteria dict -> tuple of (field, test, threshold), unknown names dropped"""
+    return tuple(
+        CRITERIA_FIELDS[name] + (threshold,)
+        for name, threshold in criteria.items() if name in CRITERIA_FIELDS
+    )
+
+
+def _columns(stocks, fields):
+    """
+    Overview records -> {field: float array}, building only the columns
+    asked for. None becomes NaN, which compares False against any threshold
+    """
+    return {field: np.array([stock.get(field) for stock in stocks], dtype=float)
+            for field in fields}
+
 class StockScreener:
     """Screen stocks based on fundamental criteria"""
     
-    def __init__(self, alpha_vantage_key):
+    def __init__(self, alpha_vantage_key, calls_per_minute=None):
+        import config
+        
         self.api_key = alpha_vantage_key
         self.base_url = "https://www.alphavantage.co/query"
+        self.calls_per_minute = calls_per_minute or config.ALPHA_VANTAGE_CALLS_PER_MINUTE
+        self.limiter = _shared_limiter(alpha_vantage_key, self.calls_per_minute)
+        self.bulk_quotes = config.ALPHA_VANTAGE_PREMIUM
         
+    def _cached_overview(self, ticker):
+        """
+        Overview from Redis
+        
+        Returns: (overview, revalidate). overview is None on a miss / when
+        Redis is off. An entry older than OVERVIEW_CACHE_TTL comes back with
+        the conditional-GET headers to refresh it with, otherwise revalidate
+        is None and the overview can be used as is
+        """
+        cache = get_redis()
+        if cache is None:
+            return None, None
+        try:
+            cached = cache.get(OVERVIEW_CACHE_KEY.format(ticker))
+            if cached is None:
+                return None, None
+            overview = orjson.loads(cached)
+        except Exception as e:
+            logger.warning(f"Overview cache read failed for {ticker}: {e}")
+            return None, None
+        
+        # Entries written before the refresh metadata have none: treat as fresh
+        fetched = overview.pop('_fetched', None)
+        etag = overview.pop('_etag', None)
+        last_modified = overview.pop('_last_modified', None)
+        if fetched is None or time.time() - fetched < OVERVIEW_CACHE_TTL:
+            logger.info(f"Overview cache hit: {ticker}")
+            return overview, None
+        
+        revalidate = {}
+        if etag:
+            revalidate['If-None-Match'] = etag
+        if last_modified:
+            revalidate['If-Modified-Since'] = last_modified
+        return overview, revalidate
+    
+    def _cache_overview(self, ticker, overview, etag=None, last_modified=None):
+        cache = get_redis()
+        if cache is None:
+            return
+        # Overviews are always read whole (screens return them and
+        # _memo_overview keeps them), so one JSON value per ticker is one
+        # round trip with no per-field decoding
+        entry = dict(overview, _fetched=time.time())
+        if etag:
+            entry['_etag'] = etag
+        if last_modified:
+            entry['_last_modified'] = last_modified
+        ttl = OVERVIEW_CACHE_TTL + (OVERVIEW_REVALIDATE_TTL if etag or last_modified else 0)
+        try:
+            cache.setex(OVERVIEW_CACHE_KEY.format(ticker), ttl, orjson.dumps(entry))
+        except Exception as e:
+            logger.warning(f"Overview cache write failed for {ticker}: {e}")
+    
+    def _is_nacked(self, ticker):
+        cache = get_redis()
+        if cache is None:
+            return False
+        try:
+            return bool(cache.exists(NACK_CACHE_KEY.format(ticker)))
+        except Exception as e:
+            logger.warning(f"Nack cache read failed for {ticker}: {e}")
+            return False
+    
+    def _nack(self, ticker):
+        cache = get_redis()
+        if cache is None:
+            return
+        try:
+            cache.setex(NACK_CACHE_KEY.format(ticker), NACK_CACHE_TTL, 1)
+        except Exception as e:
+            logger.warning(f"Nack cache write failed for {ticker}: {e}")
+    
+    def _cache_market_cap(self, ticker, market_cap, shares=None):
+        cache = get_redis()
+        if cache is None:
+            return
+        try:
+            pipe = cache.pipeline(transaction=False)
+            pipe.setex(MCAP_CACHE_KEY.format(ticker), MCAP_CACHE_TTL, market_cap)
+            if shares:
+                pipe.setex(SHARES_CACHE_KEY.format(ticker), OVERVIEW_CACHE_TTL, shares)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Market cap cache write failed for {ticker}: {e}")
+    
+    def _query(self, params, timeout=5):
+        """
+        GET the Alpha Vantage query endpoint through the rate limiter
+        Returns: parsed JSON dict
+        """
+        return self._request(params, timeout)[0]
+    
+    def _request(self, params, timeout=5, headers=None):
+        """
+        GET the Alpha Vantage query endpoint through the rate limiter
+        
+        A throttle response (HTTP 429, or a 'Note' / rate-limit 'Information'
+        notice instead of data) halves the limiter's rate and the call is
+        retried. Daily-quota notices are returned as-is: waiting won't help.
+        Returns: (parsed JSON dict, response); the dict is None on a 304
+        answer to conditional headers
+        """
+        params = {**params, 'apikey': self.api_key}
+        for attempt in range(THROTTLE_RETRIES + 1):
+            self.limiter.acquire()
+            response = _session.get(self.base_url, params=params, headers=headers, timeout=timeout)
+            
+            if response.status_code == 304:
+                return None, response
+            if response.status_code == 429:
+                notice = 'HTTP 429'
+                # A notice, not {}: an empty reply means "unknown symbol"
+                data = {'Information': 'HTTP 429 Too Many Requests'}
+            else:
+                data = orjson.loads(response.content)
+                notice = data.get('Note') or data.get('Information') or ''
+                throttled = 'Note' in data or (
+                    'rate limit' in notice.lower() and 'per day' not in notice.lower()
+                )
+                if not throttled:
+                    self.limiter.success()
+                    return data, response
+            
+            if attempt < THROTTLE_RETRIES:
+                logger.warning(f"Alpha Vantage throttled ({notice[:80]}), slowing to one call per {self.limiter.interval * 2:.1f}s")
+                self.limiter.backoff()
+        
+        return data, response
+    
     def get_company_overview(self, ticker):
         """
         Get fundamental data for a stock
         Returns: dict with P/E, ROE, EPS growth, etc.
         """
         try:
-            params = {
-                'function': 'OVERVIEW',
-                'symbol': ticker,
-                'apikey': self.api_key
-            }
+            # Copy: the memoized dict is shared by every caller in the process
+            return dict(_memo_overview(ticker, self.api_key, self.calls_per_minute, datetime.now().date()))
+        except StaleOverview as e:
+            return dict(e.overview)
+        except LookupError:
+            return None
+    
+    def _load_overview(self, ticker):
+        """Overview from Redis, else from the OVERVIEW endpoint"""
+        # Cache hits skip the rate limiter entirely
+        cached, revalidate = self._cached_overview(ticker)
+        if cached is not None and revalidate is None:
+            return cached
+        if cached is None and self._is_nacked(ticker):
+            logger.debug(f"Skipping {ticker}: no OVERVIEW data recently")
+            return None
+        
+        try:
+            # Stale entries Alpha Vantage sent validators for are refreshed
+            # conditionally; without validators this is a plain GET
+            data, response = self._request({'function': 'OVERVIEW', 'symbol': ticker}, headers=revalidate or None)
             
-            response = requests.get(self.base_url, params=params, timeout=5)
-            data = response.json()
+            if data is None:
+                logger.info(f"Overview not modified: {ticker}")
+                self._cache_overview(ticker, cached, revalidate.get('If-None-Match'), revalidate.get('If-Modified-Since'))
+                return cached
             
             if 'Symbol' not in data:
                 logger.warning(f"No data for {ticker}")
-                return None
+                # An empty reply means an unknown symbol; notices (quota,
+                # errors) say nothing about the ticker itself
+                if not data:
+                    self._nack(ticker)
+                    return None
+                return self._stale(ticker, cached)
             
             # Extract key metrics
             overview = {
@@ -44,25 +356,163 @@ class StockScreener:
                 'name': data.get('Name', ''),
                 'sector': data.get('Sector', ''),
                 'industry': data.get('Industry', ''),
-                'market_cap': float(data.get('MarketCapitalization', 0)),
-                'pe_ratio': float(data.get('PERatio', 0)) if data.get('PERatio') != 'None' else None,
-                'peg_ratio': float(data.get('PEGRatio', 0)) if data.get('PEGRatio') != 'None' else None,
-                'roe': float(data.get('ReturnOnEquityTTM', 0)) * 100 if data.get('ReturnOnEquityTTM') != 'None' else None,
-                'eps': float(data.get('EPS', 0)) if data.get('EPS') != 'None' else None,
-                'revenue_per_share': float(data.get('RevenuePerShareTTM', 0)) if data.get('RevenuePerShareTTM') != 'None' else None,
-                'profit_margin': float(data.get('ProfitMargin', 0)) * 100 if data.get('ProfitMargin') != 'None' else None,
-                'operating_margin': float(data.get('OperatingMarginTTM', 0)) * 100 if data.get('OperatingMarginTTM') != 'None' else None,
-                'revenue_growth_yoy': float(data.get('QuarterlyRevenueGrowthYOY', 0)) * 100 if data.get('QuarterlyRevenueGrowthYOY') != 'None' else None,
-                'eps_growth_yoy': float(data.get('QuarterlyEarningsGrowthYOY', 0)) * 100 if data.get('QuarterlyEarningsGrowthYOY') != 'None' else None,
-                'beta': float(data.get('Beta', 1.0)) if data.get('Beta') != 'None' else 1.0,
-                'price': float(data.get('50DayMovingAverage', 0)) if data.get('50DayMovingAverage') != 'None' else None
             }
+            for out_key, av_key, transform, default in OVERVIEW_FIELDS:
+                raw = data.get(av_key)
+                overview[out_key] = default if raw in MISSING_VALUES else transform(raw)
             
+            self._cache_overview(ticker, overview, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            self._cache_market_cap(ticker, overview['market_cap'], _to_float(data.get('SharesOutstanding')))
             return overview
             
+        except StaleOverview:
+            raise
         except Exception as e:
             logger.error(f"Error fetching {ticker}: {e}")
+            return self._stale(ticker, cached)
+    
+    def _stale(self, ticker, cached):
+        """
+        Fall back to a stale cached overview after a failed refresh
+        
+        A stale overview beats none, but it is raised rather than returned
+        so the in-process memo doesn't keep it and the next call retries
+        """
+        if cached is None:
             return None
+        logger.warning(f"Using stale overview for {ticker}")
+        raise StaleOverview(cached)
+    
+    def get_bulk_quotes(self, tickers):
+        """
+        Latest quotes for many tickers, up to 100 per request (premium keys)
+        
+        Quotes carry price and volume only - fundamentals still need
+        OVERVIEW - but one call covers a whole sector.
+        Returns: {ticker: {'price', 'volume'}}, or None if unavailable
+        """
+        if not self.bulk_quotes:
+            return None
+        
+        tickers = list(tickers)
+        quotes = {}
+        for start in range(0, len(tickers), BULK_QUOTE_LIMIT):
+            chunk = tickers[start:start + BULK_QUOTE_LIMIT]
+            try:
+                data = self._query({
+                    'function': 'REALTIME_BULK_QUOTES',
+                    'symbol': ','.join(chunk)
+                }, timeout=10)
+            except Exception as e:
+                logger.error(f"Error fetching bulk quotes: {e}")
+                return None
+            
+            rows = data.get('data')
+            if rows is None:
+                # Free-tier keys get an 'Information' notice instead of data
+                logger.warning(f"Bulk quotes unavailable: {data.get('Information') or data.get('message') or data}")
+                return None
+            
+            for row in rows:
+                symbol = str(row.get('symbol', '')).upper()
+                if symbol:
+                    quotes[symbol] = {
+                        'price': _to_float(row.get('close')),
+                        'volume': _to_float(row.get('volume'))
+                    }
+        
+        return quotes
+    
+    def _prescreen(self, tickers, criteria):
+        """
+        Drop tickers that fail price criteria using one bulk quote call, so
+        they never cost an OVERVIEW request (no-op without price criteria)
+        """
+        min_price = criteria.get('min_price')
+        max_price = criteria.get('max_price')
+        if min_price is None and max_price is None:
+            return tickers
+        
+        quotes = self.get_bulk_quotes(tickers)
+        if quotes is None:
+            return tickers
+        
+        kept = []
+        for ticker in tickers:
+            price = (quotes.get(ticker) or {}).get('price')
+            if price is None:
+                kept.append(ticker)  # No quote - let OVERVIEW decide
+            elif (min_price is None or price >= min_price) and (max_price is None or price <= max_price):
+                kept.append(ticker)
+        
+        logger.info(f"Price pre-screen kept {len(kept)} of {len(tickers)} tickers")
+        return kept
+    
+    def _prefilter_by_market_cap(self, tickers, min_cap):
+        """
+        Drop tickers known to be below min_cap before they cost an OVERVIEW call
+        
+        Market caps come from Redis; tickers with cached shares outstanding
+        but no cached cap are priced with one bulk quote call. Tickers with
+        no cap either way are kept - OVERVIEW decides for them.
+        """
+        cache = get_redis()
+        if cache is None or not tickers or not min_cap:
+            return tickers
+        
+        try:
+            caps = dict(zip(tickers, map(_to_float, cache.mget([MCAP_CACHE_KEY.format(t) for t in tickers]))))
+            missing = [t for t in tickers if caps[t] is None]
+            shares = {}
+            if missing and self.bulk_quotes:
+                shares = {
+                    t: n for t, n in zip(missing, map(_to_float, cache.mget([SHARES_CACHE_KEY.format(t) for t in missing])))
+                    if n
+                }
+        except Exception as e:
+            logger.warning(f"Market cap cache read failed: {e}")
+            return tickers
+        
+        if shares:
+            quotes = self.get_bulk_quotes(shares) or {}
+            for ticker, count in shares.items():
+                price = (quotes.get(ticker) or {}).get('price')
+                if price is not None:
+                    caps[ticker] = price * count
+                    self._cache_market_cap(ticker, caps[ticker])
+        
+        kept = [t for t in tickers if caps[t] is None or caps[t] >= min_cap]
+        logger.info(f"Market cap pre-filter kept {len(kept)} of {len(tickers)} tickers")
+        return kept
+    
+    def fetch_overviews(self, tickers):
+        """
+        Fetch company overviews concurrently, throttled by the rate limiter
+        Returns: list of (ticker, overview or None) in input order
+        """
+        tickers = list(tickers)
+        if not tickers:
+            return []
+        fetched = []
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(tickers))) as executor:
+            for done, item in enumerate(zip(tickers, executor.map(self.get_company_overview, tickers)), 1):
+                fetched.append(item)
+                if done % HEARTBEAT == 0:
+                    logger.info(f"Progress: {done}/{len(tickers)} overviews fetched")
+        return fetched
+    
+    def _fetch_universe(self, tickers, criteria):
+        """
+        Overviews of every ticker that can pass a screen, fetched once and
+        shared by the long and short filters
+        
+        Tickers failing the price or market cap bounds in criteria are
+        dropped first, so they never cost an OVERVIEW request.
+        Returns: list of overview dicts (tickers without data dropped)
+        """
+        tickers = self._prescreen(list(tickers), criteria)
+        tickers = self._prefilter_by_market_cap(tickers, criteria.get('min_market_cap'))
+        return [stock for _, stock in self.fetch_overviews(tickers) if stock is not None]
     
     def screen_sector(self, sector_tickers, criteria):
         """
@@ -75,72 +525,37 @@ class StockScreener:
         Returns:
             list of stocks that pass criteria
         """
-        passed = []
-        failed_count = 0
+        stocks = self._fetch_universe(sector_tickers, criteria)
+        failed_count = len(sector_tickers) - len(stocks)
         
-        for ticker in sector_tickers:
-            try:
-                # Rate limiting (Alpha Vantage: 5 calls/min on free tier)
-                time.sleep(1)  # ~5 per minute
-                
-                stock = self.get_company_overview(ticker)
-                
-                if stock is None:
-                    failed_count += 1
-                    continue
-                
-                # Apply criteria
-                if self._meets_criteria(stock, criteria):
-                    passed.append(stock)
-                    logger.info(f"✓ {ticker} passed screening")
-                
-                if len(passed) % 5 == 0 and len(passed) > 0:
-                    logger.info(f"Progress: {len(passed)} stocks passed so far")
-                    
-            except Exception as e:
-                logger.error(f"Error screening {ticker}: {e}")
-                failed_count += 1
+        # Apply criteria to all fetched stocks at once
+        passed = [stocks[i] for i in np.flatnonzero(self._criteria_mask(stocks, criteria))]
+        for stock in passed:
+            logger.info(f"✓ {stock['ticker']} passed screening")
         
         logger.info(f"Screening complete: {len(passed)} passed, {failed_count} failed/skipped")
         return passed
     
-    def _meets_criteria(self, stock, criteria):
-        """Check if stock meets all criteria"""
-        
-        # Market cap check
-        if 'min_market_cap' in criteria:
-            if stock['market_cap'] < criteria['min_market_cap']:
-                return False
-        
-        # Revenue growth check
-        if 'min_revenue_growth' in criteria:
-            if stock['revenue_growth_yoy'] is None or stock['revenue_growth_yoy'] < criteria['min_revenue_growth']:
-                return False
-        
-        # EPS growth check
-        if 'min_eps_growth' in criteria:
-            if stock['eps_growth_yoy'] is None or stock['eps_growth_yoy'] < criteria['min_eps_growth']:
-                return False
-        
-        # ROE check
-        if 'min_roe' in criteria:
-            if stock['roe'] is None or stock['roe'] < criteria['min_roe']:
-                return False
-        
-        # PEG ratio check (for longs)
-        if 'max_peg' in criteria:
-            if stock['peg_ratio'] is None or stock['peg_ratio'] > criteria['max_peg']:
-                return False
-        
-        # P/E ratio check
-        if 'min_pe' in criteria:
-            if stock['pe_ratio'] is None or stock['pe_ratio'] < criteria['min_pe']:
-                return False
+    def _criteria_mask(self, stocks, criteria):
+        """
+        Evaluate criteria over a list of overviews
+        Returns: boolean array, True where a stock meets all criteria
+        """
+        mask = np.ones(len(stocks), dtype=bool)
+        if not stocks:
+            return mask
         
-        if 'max_pe' in criteria:
-            if stock['pe_ratio'] is None or stock['pe_ratio'] > criteria['max_pe']:
+        rules = _criteria_rules(criteria)
+        columns = _columns(stocks, {field for field, _, _ in rules})
+        for field, test, threshold in rules:
+            mask &= test(columns[field], threshold)
+        return mask
+    
+    def _meets_criteria(self, stock, criteria):
+        """Check if a single stock meets all criteria"""
+        for field, test, threshold in _criteria_rules(criteria):
+            if stock[field] is None or not test(stock[field], threshold):
                 return False
-        
         return True
     
     def screen_longs(self, sector_tickers):
@@ -148,91 +563,151 @@ class StockScreener:
         Screen for long candidates (growth, quality)
         
         Criteria from Professional Trading Masterclass:
+        - Price >= $5
         - Market Cap > $1B
         - Revenue Growth > 10% YoY
         - EPS Growth > 20% YoY
         - ROE > 15%
         - PEG < 1.5
         """
-        criteria = {
-            'min_market_cap': 1_000_000_000,  # $1B
-            'min_revenue_growth': 10,  # 10%
-            'min_eps_growth': 20,  # 20%
-            'min_roe': 15,  # 15%
-            'max_peg': 1.5
-        }
-        
         logger.info(f"Screening {len(sector_tickers)} stocks for LONG candidates")
-        logger.info(f"Criteria: {criteria}")
+        logger.info(f"Criteria: {LONG_CRITERIA}")
         
-        return self.screen_sector(sector_tickers, criteria)
+        return self.screen_sector(sector_tickers, LONG_CRITERIA)
+    
+    def _is_short_candidate(self, stock, criteria=SHORT_CRITERIA):
+        """Liquid and expensive, with weak revenue, earnings or returns"""
+        # For shorts, we want OPPOSITE of quality
+        if not (stock['price'] and stock['price'] >= criteria['min_price'] and
+                stock['market_cap'] > criteria['min_market_cap'] and
+                stock['pe_ratio'] and stock['pe_ratio'] > criteria['min_pe']):
+            return False
+        
+        # Check for weakness
+        weak_revenue = (stock['revenue_growth_yoy'] is None or 
+                        stock['revenue_growth_yoy'] < criteria['max_revenue_growth'])
+        weak_eps = (stock['eps_growth_yoy'] is None or 
+                    stock['eps_growth_yoy'] < criteria['max_eps_growth'])
+        weak_roe = (stock['roe'] is None or 
+                    stock['roe'] < criteria['max_roe'])
+        
+        return weak_revenue or weak_eps or weak_roe
+    
+    def _short_candidates(self, stocks):
+        results = []
+        for stock in stocks:
+            try:
+                if self._is_short_candidate(stock):
+                    results.append(stock)
+                    logger.info(f"✓ {stock['ticker']} is short candidate")
+            except Exception as e:
+                logger.error(f"Error screening {stock['ticker']} for short: {e}")
+        return results
     
     def screen_shorts(self, sector_tickers):
         """
         Screen for short candidates (weakness, overvaluation)
         
         Criteria:
+        - Price >= $5 (borrowable)
         - Market Cap > $1B (liquid)
         - Revenue Growth < 5% or negative
         - EPS Growth < 5% or negative
         - ROE declining
         - P/E > 25 (overvalued)
         """
-        criteria = {
-            'min_market_cap': 1_000_000_000,  # $1B for liquidity
-            'max_revenue_growth': 5,  # Weak growth
-            'max_eps_growth': 5,  # Weak earnings
-            'max_roe': 10,  # Poor returns
-            'min_pe': 25  # Expensive
-        }
-        
         logger.info(f"Screening {len(sector_tickers)} stocks for SHORT candidates")
-        logger.info(f"Criteria: {criteria}")
+        logger.info(f"Criteria: {SHORT_CRITERIA}")
         
-        results = []
-        
-        for ticker in sector_tickers:
-            try:
-                time.sleep(1)
-                
-                stock = self.get_company_overview(ticker)
-                
-                if stock is None:
-                    continue
-                
-                # For shorts, we want OPPOSITE of quality
-                if (stock['market_cap'] > criteria['min_market_cap'] and
-                    stock['pe_ratio'] and stock['pe_ratio'] > criteria['min_pe']):
-                    
-                    # Check for weakness
-                    weak_revenue = (stock['revenue_growth_yoy'] is None or 
-                                  stock['revenue_growth_yoy'] < criteria['max_revenue_growth'])
-                    weak_eps = (stock['eps_growth_yoy'] is None or 
-                              stock['eps_growth_yoy'] < criteria['max_eps_growth'])
-                    weak_roe = (stock['roe'] is None or 
-                              stock['roe'] < criteria['max_roe'])
-                    
-                    if weak_revenue or weak_eps or weak_roe:
-                        results.append(stock)
-                        logger.info(f"✓ {ticker} is short candidate")
-                        
-            except Exception as e:
-                logger.error(f"Error screening {ticker} for short: {e}")
+        results = self._short_candidates(self._fetch_universe(sector_tickers, SHORT_CRITERIA))
         
         logger.info(f"Short screening complete: {len(results)} candidates")
         return results
+    
+    def screen_both(self, tickers):
+        """
+        Long and short screens over one fetch of each ticker
+        
+        Returns: {'longs': [...], 'shorts': [...]}
+        """
+        logger.info(f"Screening {len(tickers)} stocks for LONG and SHORT candidates")
+        
+        # Both screens have a price floor and a minimum cap, so only the
+        # looser of each filters
+        stocks = self._fetch_universe(tickers, {
+            name: min(LONG_CRITERIA[name], SHORT_CRITERIA[name])
+            for name in ('min_price', 'min_market_cap')
+        })
+        
+        longs = [stocks[i] for i in np.flatnonzero(self._criteria_mask(stocks, LONG_CRITERIA))]
+        shorts = self._short_candidates(stocks)
+        
+        logger.info(f"Screening complete: {len(longs)} longs, {len(shorts)} shorts, "
+                    f"{len(tickers) - len(stocks)} failed/skipped")
+        return {'longs': longs, 'shorts': shorts}
+
+    
+    def screen_market(self, long_or_short):
+        """
+        Screen every ticker in SECTOR_TICKERS, fetching each one once
+        
+        Args:
+            long_or_short: 'long' or 'short'
+        
+        Returns:
+            {sector: list of candidates}
+        """
+        if long_or_short not in ('long', 'short'):
+            raise ValueError(f"long_or_short must be 'long' or 'short', got {long_or_short!r}")
+        
+        logger.info(f"Screening {len(ALL_TICKERS)} stocks across {len(SECTOR_TICKERS)} sectors for {long_or_short.upper()} candidates")
+        
+        if long_or_short == 'long':
+            stocks = self._fetch_universe(ALL_TICKERS, LONG_CRITERIA)
+            candidates = [stocks[i] for i in np.flatnonzero(self._criteria_mask(stocks, LONG_CRITERIA))]
+        else:
+            stocks = self._fetch_universe(ALL_TICKERS, SHORT_CRITERIA)
+            candidates = self._short_candidates(stocks)
+        
+        by_sector = {sector: [] for sector in SECTOR_TICKERS}
+        for stock in candidates:
+            by_sector[TICKER_TO_SECTOR[stock['ticker']]].append(stock)
+        return by_sector
+
+
+# Overviews already loaded in this process. The date is part of the key,
+# so a long-lived worker re-reads Redis / the API at most once a day
+OVERVIEW_MEMO_SIZE = 4096
+
+@functools.lru_cache(maxsize=OVERVIEW_MEMO_SIZE)
+def _memo_overview(ticker, api_key, calls_per_minute, day):
+    # StaleOverview fallbacks propagate, so they aren't memoized either
+    overview = StockScreener(api_key, calls_per_minute)._load_overview(ticker)
+    if overview is None:
+        # Raise instead of returning None so failures aren't memoized
+        raise LookupError(ticker)
+    return overview
+
+StockScreener.get_company_overview.cache_clear = _memo_overview.cache_clear
 
 
 # Example sector tickers (Top holdings in each sector)
 SECTOR_TICKERS = {
-    'Financials': ['JPM', 'BAC', 'WFC', 'C', 'GS', 'MS', 'BLK', 'SCHW', 'AXP', 'USB'],
-    'Technology': ['AAPL', 'MSFT', 'NVDA', 'AVGO', 'ORCL', 'CSCO', 'ADBE', 'CRM', 'INTC', 'AMD'],
-    'Industrials': ['CAT', 'BA', 'HON', 'UNP', 'RTX', 'DE', 'LMT', 'GE', 'MMM', 'UPS'],
-    'Consumer Discretionary': ['AMZN', 'TSLA', 'HD', 'MCD', 'NKE', 'SBUX', 'TGT', 'LOW', 'TJX', 'BKNG'],
-    'Health Care': ['UNH', 'JNJ', 'LLY', 'ABBV', 'MRK', 'PFE', 'TMO', 'ABT', 'DHR', 'BMY'],
-    'Consumer Staples': ['PG', 'KO', 'PEP', 'WMT', 'COST', 'PM', 'MO', 'CL', 'MDLZ', 'KHC'],
-    'Utilities': ['NEE', 'DUK', 'SO', 'D', 'AEP', 'EXC', 'SRE', 'XEL', 'ED', 'PEG'],
-    'Energy': ['XOM', 'CVX', 'COP', 'SLB', 'EOG', 'MPC', 'PSX', 'VLO', 'OXY', 'HAL'],
-    'Materials': ['LIN', 'APD', 'ECL', 'SHW', 'FCX', 'NEM', 'DD', 'DOW', 'NUE', 'VMC'],
-    'Real Estate': ['PLD', 'AMT', 'CCI', 'EQIX', 'PSA', 'SPG', 'O', 'WELL', 'DLR', 'AVB']
+    'Financials': ('JPM', 'BAC', 'WFC', 'C', 'GS', 'MS', 'BLK', 'SCHW', 'AXP', 'USB'),
+    'Technology': ('AAPL', 'MSFT', 'NVDA', 'AVGO', 'ORCL', 'CSCO', 'ADBE', 'CRM', 'INTC', 'AMD'),
+    'Industrials': ('CAT', 'BA', 'HON', 'UNP', 'RTX', 'DE', 'LMT', 'GE', 'MMM', 'UPS'),
+    'Consumer Discretionary': ('AMZN', 'TSLA', 'HD', 'MCD', 'NKE', 'SBUX', 'TGT', 'LOW', 'TJX', 'BKNG'),
+    'Health Care': ('UNH', 'JNJ', 'LLY', 'ABBV', 'MRK', 'PFE', 'TMO', 'ABT', 'DHR', 'BMY'),
+    'Consumer Staples': ('PG', 'KO', 'PEP', 'WMT', 'COST', 'PM', 'MO', 'CL', 'MDLZ', 'KHC'),
+    'Utilities': ('NEE', 'DUK', 'SO', 'D', 'AEP', 'EXC', 'SRE', 'XEL', 'ED', 'PEG'),
+    'Energy': ('XOM', 'CVX', 'COP', 'SLB', 'EOG', 'MPC', 'PSX', 'VLO', 'OXY', 'HAL'),
+    'Materials': ('LIN', 'APD', 'ECL', 'SHW', 'FCX', 'NEM', 'DD', 'DOW', 'NUE', 'VMC'),
+    'Real Estate': ('PLD', 'AMT', 'CCI', 'EQIX', 'PSA', 'SPG', 'O', 'WELL', 'DLR', 'AVB')
+}
+
+# Every ticker once, in sector order, and each ticker's (first) sector
+ALL_TICKERS = tuple(dict.fromkeys(itertools.chain.from_iterable(SECTOR_TICKERS.values())))
+TICKER_TO_SECTOR = {
+    ticker: sector
+    for sector, tickers in reversed(SECTOR_TICKERS.items()) for ticker in tickers
 }
@@ -0,0 +1,54 @@
+"""
+Telegram Notification Service
+Sends status messages to the configured Telegram chat
+"""
+
+import logging
+from utils.http import create_session
+
+logger = logging.getLogger(__name__)
+
+# One pooled session per process: keeps the TLS connection to
+# api.telegram.org alive across notifications
+_session = create_session(pool_connections=4, pool_maxsize=16)
+
+def send_message(message, chat_id=None, parse_mode=None):
+    """
+    Send a text message via the Telegram Bot API
+
+    Args:
+        message: Message text
+        chat_id: Target chat (defaults to TELEGRAM_CHAT_ID)
+        parse_mode: Optional 'Markdown' / 'HTML'
+
+    Returns:
+        dict: Telegram API response
+    """
+    import config
+
+    token = config.TELEGRAM_BOT_TOKEN
+    chat_id = chat_id or config.TELEGRAM_CHAT_ID
+
+    if not token or not chat_id:
+        raise ValueError("TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID must be configured")
+
+    try:
+        payload = {'chat_id': chat_id, 'text': message}
+        if parse_mode:
+            payload['parse_mode'] = parse_mode
+
+        response = _session.post(
+            f"https://api.telegram.org/bot{token}/sendMessage",
+            json=payload,
+            timeout=5
+        )
+        # Not raise_for_status(): its message includes the URL, i.e. the bot token
+        if not response.ok:
+            raise RuntimeError(f"Telegram API returned {response.status_code}: {response.text[:200]}")
+
+        logger.info(f"Telegram message sent to chat {chat_id}")
+        return response.json()
+
+    except Exception as e:
+        logger.error(f"Error sending Telegram message: {e}")
+        raise
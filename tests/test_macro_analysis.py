@@ -0,0 +1,131 @@
+"""
+Tests for services.macro_analysis regime scoring
+Run: python -m unittest discover -s tests -t .
+"""
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from services.macro_analysis import MacroAnalyzer
+
+
+def _indicators(**signals):
+    """Indicators dict as analyze_regime builds it, from signal values"""
+    return {name: {'signal': signal} for name, signal in signals.items()}
+
+
+class _Cells:
+    """Stands in for excel_handler, returning fixed values from read_cells"""
+
+    def __init__(self, *values):
+        self.values = values
+
+    def read_cells(self, file_id, sheet_name, cells, revision=None):
+        return self.values
+
+
+@unittest.skipIf(numpy is None, 'numpy not installed')
+class SignalLadderTest(unittest.TestCase):
+    """Signals match the if/elif ladders they replaced, at every boundary"""
+
+    def yield_curve(self, spread, trend):
+        # 2yr at 0 so the spread is exactly the 10yr yield; the previous row
+        # sits 0.1 below (steepening) or above (flattening)
+        prev = spread - 0.1 if trend == 'STEEPENING' else spread + 0.1
+        analyzer = MacroAnalyzer(_Cells(spread, 0.0, prev, 0.0), google_drive=None)
+        return analyzer.get_yield_curve_spread()
+
+    def sentiment(self, value, trend):
+        prev = value - 1 if trend == 'RISING' else value + 1
+        analyzer = MacroAnalyzer(_Cells(value, prev), google_drive=None)
+        return analyzer.get_consumer_sentiment()
+
+    def test_yield_curve_signal(self):
+        expected = {
+            # spread: (STEEPENING, FLATTENING)
+            -0.1: (-2, -2),
+            0: (-1, -1),
+            0.29: (-1, -1),
+            0.3: (0, 0),
+            0.5: (0, 0),
+            0.51: (1, 1),
+            1.01: (2, 1),
+        }
+        for spread, signals in expected.items():
+            for trend, signal in zip(('STEEPENING', 'FLATTENING'), signals):
+                with self.subTest(spread=spread, trend=trend):
+                    self.assertEqual(self.yield_curve(spread, trend), (spread, trend, signal))
+
+    def test_sentiment_signal(self):
+        expected = {
+            # value: (RISING, FALLING)
+            69: (-2, -2),
+            70: (0, -1),
+            79: (0, -1),
+            80: (0, 0),
+            81: (1, 1),
+            91: (2, 1),
+        }
+        for value, signals in expected.items():
+            for trend, signal in zip(('RISING', 'FALLING'), signals):
+                with self.subTest(value=value, trend=trend):
+                    self.assertEqual(self.sentiment(value, trend), (value, trend, signal))
+
+    def test_blank_latest_row_has_no_signal(self):
+        analyzer = MacroAnalyzer(_Cells(None, 0.5, 1.2, 0.4), google_drive=None)
+        self.assertEqual(analyzer.get_yield_curve_spread(), (None, None, 0))
+        analyzer = MacroAnalyzer(_Cells('', 75), google_drive=None)
+        self.assertEqual(analyzer.get_consumer_sentiment(), (None, None, 0))
+
+
+@unittest.skipIf(numpy is None, 'numpy not installed')
+class ScoreRegimesTest(unittest.TestCase):
+    """Scores match the per-regime if/elif rules they replaced"""
+
+    def setUp(self):
+        self.analyzer = MacroAnalyzer(excel_handler=None, google_drive=None)
+
+    def assertScores(self, indicators, expected):
+        scores = self.analyzer.score_regimes(indicators)
+        self.assertEqual(set(scores), set(expected))
+        for regime, score in expected.items():
+            self.assertAlmostEqual(scores[regime], score, places=9, msg=regime)
+
+    def test_expansion_signals(self):
+        self.assertScores(
+            _indicators(yield_curve=2, ism=1, credit_spread=0, sentiment=2, permits=0, claims=0),
+            {'EXPANSION': 0.7875, 'LATE_CYCLE': 0.64375, 'RECESSION': 0.2125, 'RECOVERY': 0.825},
+        )
+
+    def test_recession_signals(self):
+        self.assertScores(
+            _indicators(yield_curve=-2, ism=1, credit_spread=-1, sentiment=-2, permits=1, claims=-1),
+            {'EXPANSION': 0.2875, 'LATE_CYCLE': 0.61875, 'RECESSION': 0.7125, 'RECOVERY': 0.29375},
+        )
+
+    def test_flat_curve_with_rising_permits(self):
+        self.assertScores(
+            _indicators(yield_curve=-1, ism=1, credit_spread=0, sentiment=1, permits=2, claims=0),
+            {'EXPANSION': 0.55, 'LATE_CYCLE': 0.6375, 'RECESSION': 0.45, 'RECOVERY': 0.58125},
+        )
+
+    def test_missing_indicators_count_as_neutral(self):
+        self.assertScores(
+            {'yield_curve': {'signal': None}},
+            {'EXPANSION': 0.5, 'LATE_CYCLE': 0.5, 'RECESSION': 0.5, 'RECOVERY': 0.5},
+        )
+
+    def test_score_regime_matches_score_regimes(self):
+        indicators = _indicators(yield_curve=-2, ism=1, sentiment=1)
+        scores = self.analyzer.score_regimes(indicators)
+        for regime, score in scores.items():
+            self.assertEqual(self.analyzer.score_regime(regime, indicators), score)
+
+
+if __name__ == '__main__':
+    unittest.main()
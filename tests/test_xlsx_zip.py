@@ -0,0 +1,218 @@
+"""
+Tests for utils.xlsx_zip against small hand-built workbooks
+Run: python -m unittest discover -s tests -t .
+"""
+
+import io
+import re
+import unittest
+import zipfile
+from datetime import date, datetime
+
+from utils import xlsx_zip
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '</Types>'
+)
+
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+# xf 0: default, xf 1: #,##0.00 (built-in 4), xf 2: custom yyyy-mm-dd
+STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy\\-mm\\-dd"/></numFmts>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="4" fontId="1" fillId="0" borderId="1" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '</styleSheet>'
+)
+
+SHARED_STRINGS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="2" uniqueCount="2">'
+    '<si><t>Date</t></si><si><t>Value</t></si>'
+    '</sst>'
+)
+
+# Header, one data row, then a pre-formatted blank row 3
+SHEET = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<dimension ref="A1:B3"/>'
+    '<sheetData>'
+    '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c></row>'
+    '<row r="2"><c r="A2" s="2"><v>45292</v></c><c r="B2" s="1"><v>10</v></c></row>'
+    '<row r="3"><c r="A3" s="1"/><c r="B3" s="1"/></row>'
+    '</sheetData>'
+    '</worksheet>'
+)
+
+
+def make_workbook(sheet=SHEET, shared_strings=True):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as z:
+        z.writestr('[Content_Types].xml', CONTENT_TYPES)
+        z.writestr('xl/workbook.xml', WORKBOOK)
+        z.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        z.writestr('xl/styles.xml', STYLES)
+        z.writestr('xl/worksheets/sheet1.xml', sheet)
+        if shared_strings:
+            z.writestr('xl/sharedStrings.xml', SHARED_STRINGS)
+    buffer.seek(0)
+    return buffer
+
+
+def read_part(buffer, part):
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as z:
+        return z.read(part).decode('utf-8')
+
+
+def cell(sheet_xml, ref):
+    match = re.search(r'<c r="' + ref + r'"[^>]*?(?:/>|>.*?</c>)', sheet_xml)
+    return match.group(0) if match else None
+
+
+def xf_num_format(styles_xml, index):
+    xfs = re.findall(r'<xf\b[^>]*>', re.search(r'<cellXfs.*?</cellXfs>', styles_xml).group(0))
+    return int(re.search(r'numFmtId="(\d+)"', xfs[index]).group(1))
+
+
+class PatchCellsTest(unittest.TestCase):
+
+    def patch(self, updates, **kwargs):
+        out = io.BytesIO()
+        xlsx_zip.patch_cells(make_workbook(**kwargs), out, [('Data', ref, v) for ref, v in updates.items()])
+        return out
+
+    def test_overwrite_keeps_style(self):
+        out = self.patch({'B2': 12.5})
+        self.assertEqual(cell(read_part(out, 'xl/worksheets/sheet1.xml'), 'B2'),
+                         '<c r="B2" s="1"><v>12.5</v></c>')
+
+    def test_insert_cell_in_column_order(self):
+        sheet = read_part(self.patch({'D2': 1, 'C2': 2}), 'xl/worksheets/sheet1.xml')
+        row = re.search(r'<row r="2".*?</row>', sheet).group(0)
+        self.assertEqual(re.findall(r'<c r="(\w+)"', row), ['A2', 'B2', 'C2', 'D2'])
+        self.assertIn('<dimension ref="A1:D3"/>', sheet)
+
+    def test_insert_new_row(self):
+        sheet = read_part(self.patch({'A5': 7}), 'xl/worksheets/sheet1.xml')
+        self.assertEqual(re.findall(r'<row r="(\d+)"', sheet), ['1', '2', '3', '5'])
+        self.assertEqual(cell(sheet, 'A5'), '<c r="A5"><v>7</v></c>')
+
+    def test_text_reuses_and_appends_shared_strings(self):
+        out = self.patch({'C1': 'Value', 'D1': 'Note & more'})
+        sheet = read_part(out, 'xl/worksheets/sheet1.xml')
+        self.assertEqual(cell(sheet, 'C1'), '<c r="C1" t="s"><v>1</v></c>')
+        self.assertEqual(cell(sheet, 'D1'), '<c r="D1" t="s"><v>2</v></c>')
+
+        sst = read_part(out, 'xl/sharedStrings.xml')
+        self.assertIn('count="4" uniqueCount="3"', sst)
+        self.assertIn('<si><t xml:space="preserve">Note &amp; more</t></si>', sst)
+
+    def test_text_inline_without_shared_strings(self):
+        sheet = read_part(self.patch({'C1': 'x<y'}, shared_strings=False), 'xl/worksheets/sheet1.xml')
+        self.assertIn('t="inlineStr"', cell(sheet, 'C1'))
+        self.assertIn('x&lt;y', cell(sheet, 'C1'))
+
+    def test_formula(self):
+        sheet = read_part(self.patch({'C2': '=B2*2'}), 'xl/worksheets/sheet1.xml')
+        self.assertEqual(cell(sheet, 'C2'), '<c r="C2"><f>B2*2</f></c>')
+
+    def test_date_into_date_styled_cell_keeps_style(self):
+        out = self.patch({'A2': date(2024, 1, 2)})
+        self.assertEqual(cell(read_part(out, 'xl/worksheets/sheet1.xml'), 'A2'),
+                         '<c r="A2" s="2"><v>45293</v></c>')
+        # Nothing to add to styles.xml
+        self.assertIn('<cellXfs count="3">', read_part(out, 'xl/styles.xml'))
+
+    def test_date_into_number_styled_cell_gets_date_copy(self):
+        out = self.patch({'B2': datetime(2024, 1, 2, 13, 30)})
+        sheet, styles = read_part(out, 'xl/worksheets/sheet1.xml'), read_part(out, 'xl/styles.xml')
+        self.assertEqual(cell(sheet, 'B2'), '<c r="B2" s="3"><v>45293.5625</v></c>')
+        self.assertEqual(xf_num_format(styles, 3), 22)
+        # The copy keeps the original font and border
+        self.assertIn('<xf numFmtId="22" fontId="1" fillId="0" borderId="1" xfId="0" applyNumberFormat="1"/>', styles)
+
+    def test_date_into_unstyled_cell(self):
+        out = self.patch({'C2': date(2024, 1, 2)})
+        styles = read_part(out, 'xl/styles.xml')
+        style = int(re.search(r's="(\d+)"', cell(read_part(out, 'xl/worksheets/sheet1.xml'), 'C2')).group(1))
+        self.assertEqual(xf_num_format(styles, style), 14)
+
+    def test_unknown_sheet(self):
+        with self.assertRaises(ValueError):
+            xlsx_zip.patch_cells(make_workbook(), io.BytesIO(), [('Missing', 'A1', 1)])
+
+
+class AppendRowsTest(unittest.TestCase):
+
+    def test_appends_below_styled_blank_rows(self):
+        out = io.BytesIO()
+        xlsx_zip.append_rows(make_workbook(), out, 'Data', [[datetime(2024, 1, 2, 13, 30), 3]])
+        sheet = read_part(out, 'xl/worksheets/sheet1.xml')
+
+        # Row 3 only has styled blanks but still counts, as in openpyxl
+        self.assertEqual(cell(sheet, 'A3'), '<c r="A3" s="1"/>')
+        self.assertEqual(cell(sheet, 'B4'), '<c r="B4"><v>3</v></c>')
+        style = int(re.search(r's="(\d+)"', cell(sheet, 'A4')).group(1))
+        self.assertEqual(xf_num_format(read_part(out, 'xl/styles.xml'), style), 22)
+        self.assertIn('<dimension ref="A1:B4"/>', sheet)
+
+    def test_appends_to_empty_sheet(self):
+        empty = SHEET.replace(re.search(r'<sheetData>.*</sheetData>', SHEET).group(0), '<sheetData/>')
+        out = io.BytesIO()
+        xlsx_zip.append_rows(make_workbook(sheet=empty), out, 'Data', [['a', None, 1]])
+        sheet = read_part(out, 'xl/worksheets/sheet1.xml')
+        self.assertEqual(re.findall(r'<c r="(\w+)"', sheet), ['A1', 'C1'])
+
+
+class ReadTest(unittest.TestCase):
+
+    def test_read_header(self):
+        self.assertEqual(xlsx_zip.read_header(make_workbook(), 'Data'), ['Date', 'Value'])
+
+    def test_read_dimensions(self):
+        self.assertEqual(xlsx_zip.read_dimensions(make_workbook()), {'Data': (3, 2)})
+
+
+class HelpersTest(unittest.TestCase):
+
+    def test_cell_refs(self):
+        self.assertEqual(xlsx_zip.split_cell_ref('$AB$12'), (12, 28))
+        self.assertEqual(xlsx_zip.column_letter(28), 'AB')
+
+    def test_excel_serial(self):
+        self.assertEqual(xlsx_zip.to_excel_serial(date(1900, 3, 1)), 61)
+        self.assertEqual(xlsx_zip.to_excel_serial(datetime(2024, 1, 2, 12)), 45293.5)
+
+    def test_date_format_codes(self):
+        self.assertTrue(xlsx_zip._is_date_format_code('yyyy\\-mm\\-dd'))
+        self.assertTrue(xlsx_zip._is_date_format_code('[h]:mm'))
+        self.assertFalse(xlsx_zip._is_date_format_code('[Red]#,##0.00'))
+        self.assertFalse(xlsx_zip._is_date_format_code('"days" 0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
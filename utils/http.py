@@ -0,0 +1,42 @@
+"""
+HTTP Utilities
+Shared helpers for connection-pooled requests sessions
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Transient statuses worth retrying (rate limits and gateway errors)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def create_session(pool_connections=4, pool_maxsize=16, total_retries=3,
+                   backoff_factor=0.3, status_forcelist=RETRY_STATUSES):
+    """
+    Create a requests.Session with keep-alive connection pooling and retries
+
+    Args:
+        pool_connections: Number of host pools to cache
+        pool_maxsize: Max connections kept alive per host
+        total_retries: Retry budget for connection errors / retryable statuses
+        backoff_factor: Exponential backoff factor between retries
+        status_forcelist: HTTP statuses that trigger a retry
+
+    Returns:
+        requests.Session: Session to reuse across calls
+    """
+    retry = Retry(
+        total=total_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
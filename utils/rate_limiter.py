@@ -0,0 +1,75 @@
+"""
+Rate Limiting
+Thread-safe token bucket for throttling calls to rate-limited APIs
+"""
+
+import threading
+import time
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` calls per `per` seconds
+
+    Up to `burst` calls (default: `rate`) may go out back to back; after
+    that one token refills every per/rate seconds. Safe to share between
+    threads - callers block in acquire() until their call is allowed.
+
+    backoff() slows the bucket down after throttling; every `recover_after`
+    consecutive success() calls undo one backoff step.
+    """
+
+    def __init__(self, rate, per=60.0, burst=None, recover_after=5):
+        self.base_interval = per / rate
+        self.interval = self.base_interval
+        self.max_interval = per
+        self.capacity = burst or rate
+        self.recover_after = recover_after
+        self._successes = 0
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until one call may be made"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) / self.interval
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.interval
+            time.sleep(wait)
+
+    def backoff(self, factor=2.0):
+        """
+        Slow down after the server signalled throttling
+
+        The refill interval grows by `factor` (capped at one call per
+        `per` seconds) and the bucket is emptied, so the next call waits
+        a full new interval.
+        """
+        with self._lock:
+            self.interval = min(self.interval * factor, self.max_interval)
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+            self._successes = 0
+
+    def success(self, factor=2.0):
+        """
+        Record a call that was not throttled
+
+        After `recover_after` in a row the refill interval shrinks by
+        `factor`, back down to the configured per/rate.
+        """
+        with self._lock:
+            if self.interval <= self.base_interval:
+                return
+            self._successes += 1
+            if self._successes >= self.recover_after:
+                self._successes = 0
+                self.interval = max(self.interval / factor, self.base_interval)
@@ -0,0 +1,53 @@
+"""
+Redis Client
+Optional shared Redis connection for cross-process caches
+"""
+
+import logging
+import threading
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+_disabled = False
+
+def get_redis():
+    """
+    Return the process-wide Redis client, or None when caching is off
+
+    Caching is off when REDIS_URL is unset, the redis package is missing,
+    or the server could not be reached on first use.
+    """
+    global _client, _disabled
+    if _client is not None or _disabled:
+        return _client
+
+    with _client_lock:
+        if _client is not None or _disabled:
+            return _client
+
+        import config
+        if not config.REDIS_URL or redis is None:
+            _disabled = True
+            return None
+
+        try:
+            client = redis.Redis.from_url(
+                config.REDIS_URL,
+                socket_timeout=2,
+                socket_connect_timeout=2,
+                health_check_interval=30
+            )
+            client.ping()
+            _client = client
+            logger.info("Redis cache connected")
+        except Exception as e:
+            logger.warning(f"Redis unavailable, caching disabled: {e}")
+            _disabled = True
+        return _client
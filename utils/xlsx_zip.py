@@ -0,0 +1,803 @@
+"""
+XLSX Package Utilities
+Read and patch .xlsx/.xlsm files at the ZIP/XML level, touching only the
+parts that change instead of loading the whole workbook into openpyxl
+"""
+
+import re
+import numbers
+import posixpath
+import zipfile
+from collections import defaultdict
+from html import unescape
+from itertools import chain
+from datetime import datetime, date, time
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_DOC_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+WORKBOOK_PART = 'xl/workbook.xml'
+WORKBOOK_RELS_PART = 'xl/_rels/workbook.xml.rels'
+STYLES_PART = 'xl/styles.xml'
+SHARED_STRINGS_PART = 'xl/sharedStrings.xml'
+CONTENT_TYPES_PART = '[Content_Types].xml'
+
+EPOCH_1900 = datetime(1899, 12, 30)
+EPOCH_1904 = datetime(1904, 1, 1)
+
+_CELL_REF = re.compile(r'^\$?([A-Za-z]{1,3})\$?([0-9]+)$')
+_SHEET_DATA = re.compile(r'<(\w+:|)sheetData\b[^>]*?(/?)>')
+_ROW_OPEN = re.compile(r'<(\w+:|)row\b([^>]*?)(/?)>')
+_CELL = re.compile(r'<(\w+:|)c\b([^>]*?)(?:/>|>(.*?)</\1c>)', re.S)
+_DIMENSION = re.compile(r'(<(?:\w+:|)dimension\b[^>]*?\bref=")([^"]*)(")')
+_DIMENSION_BYTES = re.compile(rb'<(?:\w+:|)dimension\b[^>]*?\bref="([^"]*)"')
+_ROW_BYTES = re.compile(rb'<(?:\w+:|)row\b[^>]*?(?<!/)>(.*?)</(?:\w+:|)row>', re.S)
+_T_TEXT = re.compile(r'<(?:\w+:|)t\b[^>]*>(.*?)</(?:\w+:|)t>', re.S)
+_SI = re.compile(r'<(\w+:|)si\b[^>]*?(?:/>|>(.*?)</\1si>)', re.S)
+_PLAIN_SI = re.compile(r'\s*<(?:\w+:|)t\b[^>]*>([^<]*)</(?:\w+:|)t>\s*')
+_CALC_PR = re.compile(r'<(\w+:|)calcPr\b([^>]*?)/>')
+_CALC_PR_ANCHOR = re.compile(r'</(?:\w+:|)(?:sheets|functionGroups|externalReferences|definedNames)>')
+_SHARED_FORMULA_MASTER = re.compile(r'<(?:\w+:|)f\b[^>]*\bt="shared"[^>]*\bref="')
+
+
+class XlsxPatchError(Exception):
+    """Raised when a package can't be patched in place (callers fall back to openpyxl)"""
+
+
+def column_index(letters):
+    """Convert column letters to a 1-based index ('A' -> 1, 'AA' -> 27)"""
+    index = 0
+    for ch in letters.upper():
+        index = index * 26 + (ord(ch) - 64)
+    return index
+
+def column_letter(index):
+    """Convert a 1-based column index to letters (27 -> 'AA')"""
+    letters = ''
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def split_cell_ref(cell):
+    """Split 'B2' into (row, column) as 1-based integers"""
+    match = _CELL_REF.match(str(cell).strip())
+    if not match:
+        raise ValueError(f"Invalid cell reference: {cell}")
+    return int(match.group(2)), column_index(match.group(1))
+
+def _get_attr(attrs, name):
+    match = re.search(r'(?<![\w:])' + name + r'\s*=\s*(["\'])(.*?)\1', attrs)
+    return match.group(2) if match else None
+
+def _drop_attr(attrs, name):
+    return re.sub(r'\s+' + name + r'\s*=\s*(["\']).*?\1', '', attrs)
+
+
+#═══════════════════════════════════════════════════════════════════════════════
+# WORKBOOK STRUCTURE
+#═══════════════════════════════════════════════════════════════════════════════
+
+def get_sheet_parts(zin):
+    """
+    Map sheet names to their worksheet part paths (in workbook order)
+
+    Args:
+        zin: open zipfile.ZipFile
+
+    Returns:
+        dict: {'Data': 'xl/worksheets/sheet1.xml', ...}
+    """
+    workbook = ET.fromstring(zin.read(WORKBOOK_PART))
+    rels = ET.fromstring(zin.read(WORKBOOK_RELS_PART))
+
+    targets = {}
+    for rel in rels.iter(f'{{{NS_PKG_REL}}}Relationship'):
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join('xl', target))
+        targets[rel.get('Id')] = target
+
+    parts = {}
+    for sheet in workbook.iter(f'{{{NS_MAIN}}}sheet'):
+        rel_id = sheet.get(f'{{{NS_DOC_REL}}}id')
+        if rel_id in targets:
+            parts[sheet.get('name')] = targets[rel_id]
+    return parts
+
+def _read_dimension_ref(zin, part, chunk_size=4096):
+    """Read a worksheet part only as far as its <dimension> element"""
+    head = b''
+    with zin.open(part) as stream:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                return None
+            head += chunk
+            match = _DIMENSION_BYTES.search(head)
+            if match:
+                return match.group(1).decode('utf-8')
+            if b'sheetData' in head:
+                # <dimension> always precedes <sheetData>; it's absent
+                return None
+
+def read_dimensions(src):
+    """
+    Get each sheet's used range from its <dimension> element
+
+    Only the first few KB of every worksheet part are decompressed.
+
+    Args:
+        src: Path or binary file-like object of the xlsx
+
+    Returns:
+        dict: {sheet_name: (max_row, max_column)}, or None for a sheet
+              with no <dimension> element
+    """
+    with zipfile.ZipFile(src, 'r') as zin:
+        dimensions = {}
+        for name, part in get_sheet_parts(zin).items():
+            ref = _read_dimension_ref(zin, part)
+            if ref is None:
+                dimensions[name] = None
+                continue
+            max_row, max_col = split_cell_ref(ref.split(':')[-1])
+            dimensions[name] = (max_row, max_col)
+        return dimensions
+
+def _uses_1904_dates(workbook_xml):
+    match = re.search(r'<(?:\w+:|)workbookPr\b([^>]*)>', workbook_xml)
+    return bool(match) and _get_attr(match.group(1), 'date1904') in ('1', 'true')
+
+def _force_full_calc(workbook_xml):
+    """Ask Excel to recalculate formulas on open (cached results may be stale)"""
+    match = _CALC_PR.search(workbook_xml)
+    if match:
+        attrs = _drop_attr(match.group(2), 'fullCalcOnLoad')
+        tag = f'<{match.group(1)}calcPr{attrs} fullCalcOnLoad="1"/>'
+        return workbook_xml[:match.start()] + tag + workbook_xml[match.end():]
+
+    anchors = list(_CALC_PR_ANCHOR.finditer(workbook_xml))
+    if not anchors:
+        return workbook_xml
+    prefix = re.match(r'</(\w+:|)', anchors[-1].group(0)).group(1)
+    pos = anchors[-1].end()
+    return workbook_xml[:pos] + f'<{prefix}calcPr fullCalcOnLoad="1"/>' + workbook_xml[pos:]
+
+def _drop_calc_chain(name, data):
+    """Remove calcChain references (Excel rebuilds it; a stale one triggers repair)"""
+    text = data.decode('utf-8')
+    if name == CONTENT_TYPES_PART:
+        text = re.sub(r'<Override\b[^>]*calcChain[^>]*/>', '', text)
+    elif name == WORKBOOK_RELS_PART:
+        text = re.sub(r'<Relationship\b[^>]*calcChain[^>]*/>', '', text)
+    return text.encode('utf-8')
+
+
+#═══════════════════════════════════════════════════════════════════════════════
+# CELL XML
+#═══════════════════════════════════════════════════════════════════════════════
+
+def to_excel_serial(value, date1904=False):
+    """Convert date/datetime/time to an Excel serial number"""
+    if isinstance(value, time):
+        return (value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6) / 86400
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None)
+    delta = value - (EPOCH_1904 if date1904 else EPOCH_1900)
+    serial = delta.days + delta.seconds / 86400 + delta.microseconds / 86400e6
+    return int(serial) if serial == int(serial) else serial
+
+def _format_number(value):
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    return repr(float(value))
+
+def build_cell_xml(prefix, ref, value, style=None, date1904=False, shared_strings=None):
+    """
+    Build a <c> element for a Python value
+
+    None clears the value, str starting with '=' becomes a formula (as in
+    openpyxl), other strings go to shared_strings when given (inline
+    otherwise); dates become serials.
+    """
+    head = f'<{prefix}c r="{ref}"' + (f' s="{style}"' if style is not None else '')
+
+    if value is None:
+        return head + '/>'
+    if isinstance(value, bool):
+        return f'{head} t="b"><{prefix}v>{int(value)}</{prefix}v></{prefix}c>'
+    if isinstance(value, (datetime, date, time)):
+        value = to_excel_serial(value, date1904)
+    if isinstance(value, numbers.Number):
+        if value != value or value in (float('inf'), float('-inf')):
+            return head + '/>'  # NaN/inf can't be stored
+        return f'{head}><{prefix}v>{_format_number(value)}</{prefix}v></{prefix}c>'
+
+    text = str(value)
+    if text.startswith('=') and len(text) > 1:
+        return f'{head}><{prefix}f>{escape(text[1:])}</{prefix}f></{prefix}c>'
+    if shared_strings is not None:
+        return f'{head} t="s"><{prefix}v>{shared_strings.index(text)}</{prefix}v></{prefix}c>'
+    return (
+        f'{head} t="inlineStr"><{prefix}is><{prefix}t xml:space="preserve">'
+        f'{escape(text)}</{prefix}t></{prefix}is></{prefix}c>'
+    )
+
+
+#═══════════════════════════════════════════════════════════════════════════════
+# SHARED STRINGS
+#═══════════════════════════════════════════════════════════════════════════════
+
+class SharedStrings:
+    """
+    Append-only view of xl/sharedStrings.xml
+
+    The table is only scanned on the first lookup; existing plain entries
+    are reused and new ones appended before </sst>.
+    """
+
+    def __init__(self, sst_xml):
+        self.sst_xml = sst_xml
+        self._lookup = None
+        self._size = 0
+        self._added = []
+        self._refs = 0
+
+    def _load(self):
+        self._lookup = {}
+        for i, match in enumerate(_SI.finditer(self.sst_xml)):
+            # Only plain <si><t>..</t></si>: reusing a rich-text entry
+            # would carry its run formatting into the new cell
+            plain = _PLAIN_SI.fullmatch(match.group(2) or '')
+            if plain:
+                self._lookup.setdefault(unescape(plain.group(1)), i)
+            self._size = i + 1
+
+    def index(self, text):
+        """Index of text in the table, appending it if new"""
+        if self._lookup is None:
+            self._load()
+        self._refs += 1
+        if text not in self._lookup:
+            self._lookup[text] = self._size
+            self._size += 1
+            self._added.append(text)
+        return self._lookup[text]
+
+    @property
+    def changed(self):
+        return self._refs > 0
+
+    def render(self):
+        """sharedStrings.xml with new entries and updated counts"""
+        match = re.search(r'<(\w+:|)sst\b([^>]*?)(/?)>', self.sst_xml)
+        prefix, attrs = match.group(1), match.group(2)
+
+        count = _get_attr(attrs, 'count')
+        count = (int(count) if count else self._size - len(self._added)) + self._refs
+        attrs = _drop_attr(_drop_attr(attrs, 'count'), 'uniqueCount')
+        open_tag = f'<{prefix}sst{attrs} count="{count}" uniqueCount="{self._size}">'
+
+        added = ''.join(
+            f'<{prefix}si><{prefix}t xml:space="preserve">{escape(text)}</{prefix}t></{prefix}si>'
+            for text in self._added
+        )
+        if match.group(3):
+            # <sst/> - no entries yet
+            return self.sst_xml[:match.start()] + open_tag + added + f'</{prefix}sst>' + self.sst_xml[match.end():]
+
+        close = self.sst_xml.rindex(f'</{prefix}sst>')
+        return (self.sst_xml[:match.start()] + open_tag + self.sst_xml[match.end():close]
+                + added + self.sst_xml[close:])
+
+
+#═══════════════════════════════════════════════════════════════════════════════
+# STYLES
+#═══════════════════════════════════════════════════════════════════════════════
+
+def _date_format_id(value):
+    """Built-in number format for a date-like value (None for anything else)"""
+    if isinstance(value, datetime):
+        return 14 if value.time() == time(0) else 22  # m/d/yyyy, m/d/yyyy h:mm
+    if isinstance(value, date):
+        return 14
+    if isinstance(value, time):
+        return 21  # h:mm:ss
+    return None
+
+# Built-in number formats that display dates / times
+_BUILTIN_DATE_FORMATS = frozenset(chain(range(14, 23), range(27, 37), range(45, 48), range(50, 59)))
+
+_XF = re.compile(r'<(?:\w+:|)xf\b([^>]*?)(?:/>|>.*?</(?:\w+:|)xf>)', re.S)
+_NUM_FMT = re.compile(r'<(?:\w+:|)numFmt\b([^>]*?)/?>')
+
+def _is_date_format_code(code):
+    """Whether a custom number format code displays a date or time"""
+    # Drop literals ("text", \x) and colour / condition brackets, but keep
+    # elapsed-time brackets like [h]
+    code = re.sub(r'"[^"]*"|\\.|\[(?![hms]+\])[^\]]*\]', '', code, flags=re.I)
+    return bool(re.search(r'[dmyhs]', code, re.I))
+
+
+class CellStyles:
+    """
+    Date styles for patched cells, backed by xl/styles.xml cellXfs
+
+    A date written to a cell whose style doesn't show dates gets a copy of
+    that style with a date number format (as openpyxl switches the format
+    on assignment), so it doesn't display as a serial number. Copies are
+    appended to cellXfs on first use.
+    """
+
+    def __init__(self, styles_xml):
+        self.styles_xml = styles_xml
+        self._cell_xfs = re.search(r'<(\w+:|)cellXfs\b([^>]*?)>(.*?)</\1cellXfs>', styles_xml, re.S)
+        self._xfs = [m.group(0) for m in _XF.finditer(self._cell_xfs.group(3))] if self._cell_xfs else []
+        self._custom = {}
+        for match in _NUM_FMT.finditer(styles_xml):
+            fmt_id, code = _get_attr(match.group(1), 'numFmtId'), _get_attr(match.group(1), 'formatCode')
+            if fmt_id is not None and code is not None:
+                self._custom[int(fmt_id)] = unescape(code)
+        self._derived = {}
+        self._added = []
+
+    def _number_format(self, xf_index):
+        if xf_index >= len(self._xfs):
+            return 0
+        fmt = _get_attr(re.match(r'<[^>]*>', self._xfs[xf_index]).group(0), 'numFmtId')
+        return int(fmt) if fmt else 0
+
+    def _is_date_style(self, xf_index):
+        fmt = self._number_format(xf_index)
+        if fmt in self._custom:
+            return _is_date_format_code(self._custom[fmt])
+        return fmt in _BUILTIN_DATE_FORMATS
+
+    def date_style(self, style, value):
+        """
+        Style index to write value with
+
+        Args:
+            style: The cell's current s= attribute (None if unstyled)
+            value: Value being written
+
+        Returns:
+            str or None: s= attribute for the new cell
+        """
+        fmt = _date_format_id(value)
+        if fmt is None or not self._xfs:
+            return style
+        base = int(style) if style else 0
+        if style and self._is_date_style(base):
+            return style
+
+        key = (base if style else None, fmt)
+        if key not in self._derived:
+            self._derived[key] = str(self._find_or_add(key[0], fmt))
+        return self._derived[key]
+
+    def _find_or_add(self, base, fmt):
+        if base is None:
+            # Unstyled cell: reuse a plain xf showing this format if there is one
+            for i, xf in enumerate(self._xfs):
+                attrs = re.match(r'<[^>]*>', xf).group(0)
+                plain = all(_get_attr(attrs, a) in (None, '0') for a in ('fontId', 'fillId', 'borderId'))
+                if plain and _get_attr(attrs, 'numFmtId') == str(fmt):
+                    return i
+            prefix = self._cell_xfs.group(1)
+            xf = (f'<{prefix}xf numFmtId="{fmt}" fontId="0" fillId="0" '
+                  f'borderId="0" xfId="0" applyNumberFormat="1"/>')
+        else:
+            # Same font / fill / border / alignment, date number format
+            source = self._xfs[base] if base < len(self._xfs) else self._xfs[0]
+            open_tag = re.match(r'<(\w+:|)xf\b([^>]*?)(/?)>', source)
+            attrs = _drop_attr(_drop_attr(open_tag.group(2), 'numFmtId'), 'applyNumberFormat')
+            xf = (f'<{open_tag.group(1)}xf numFmtId="{fmt}"{attrs} applyNumberFormat="1"{open_tag.group(3)}>'
+                  + source[open_tag.end():])
+        self._xfs.append(xf)
+        self._added.append(xf)
+        return len(self._xfs) - 1
+
+    @property
+    def changed(self):
+        return bool(self._added)
+
+    def render(self):
+        """styles.xml with the added xfs and an updated cellXfs count"""
+        match = self._cell_xfs
+        prefix, attrs, body = match.groups()
+        attrs = _drop_attr(attrs, 'count') + f' count="{len(self._xfs)}"'
+        cell_xfs = f'<{prefix}cellXfs{attrs}>{body}{"".join(self._added)}</{prefix}cellXfs>'
+        return self.styles_xml[:match.start()] + cell_xfs + self.styles_xml[match.end():]
+
+
+#═══════════════════════════════════════════════════════════════════════════════
+# SHEET PATCHING
+#═══════════════════════════════════════════════════════════════════════════════
+
+def _patch_row_cells(inner, row_updates, cell_xml):
+    """Rewrite the cells of one row, inserting new cells in column order"""
+    pending = sorted(row_updates)
+    out = []
+    pos = 0
+    idx = 0
+
+    for match in _CELL.finditer(inner):
+        if idx == len(pending):
+            break
+        ref = _get_attr(match.group(2), 'r')
+        if ref is None:
+            raise XlsxPatchError("Cells without explicit references are not supported")
+        col = split_cell_ref(ref)[1]
+
+        while idx < len(pending) and pending[idx] < col:
+            out.append(inner[pos:match.start()])
+            out.append(cell_xml(*row_updates[pending[idx]]))
+            pos = match.start()
+            idx += 1
+
+        if idx < len(pending) and pending[idx] == col:
+            if match.group(3) and _SHARED_FORMULA_MASTER.search(match.group(3)):
+                raise XlsxPatchError(f"Cell {ref} anchors a shared formula")
+            style = _get_attr(match.group(2), 's')
+            out.append(inner[pos:match.start()])
+            out.append(cell_xml(*row_updates[pending[idx]], style=style))
+            pos = match.end()
+            idx += 1
+
+    # Cells after the last existing one go before any trailing <extLst>
+    tail = inner[pos:]
+    ext = re.search(r'<(?:\w+:|)extLst\b', tail)
+    split = ext.start() if ext else len(tail)
+    out.append(tail[:split])
+    for col in pending[idx:]:
+        out.append(cell_xml(*row_updates[col]))
+    out.append(tail[split:])
+    return ''.join(out)
+
+def _new_row_xml(prefix, row_num, row_updates, cell_xml):
+    cells = ''.join(cell_xml(*row_updates[col]) for col in sorted(row_updates))
+    return f'<{prefix}row r="{row_num}">{cells}</{prefix}row>'
+
+def _patch_sheet_data(body, prefix, by_row, cell_xml, scan_from=0):
+    """Apply {row: {col: (ref, value)}} to the contents of <sheetData>"""
+    pending = sorted(by_row)
+    out = []
+    pos = 0
+    idx = 0
+
+    for match in _ROW_OPEN.finditer(body, scan_from):
+        if idx == len(pending):
+            break
+        attrs = match.group(2)
+        row_attr = _get_attr(attrs, 'r')
+        if row_attr is None:
+            raise XlsxPatchError("Rows without explicit numbers are not supported")
+        row_num = int(row_attr)
+
+        while idx < len(pending) and pending[idx] < row_num:
+            out.append(body[pos:match.start()])
+            out.append(_new_row_xml(prefix, pending[idx], by_row[pending[idx]], cell_xml))
+            pos = match.start()
+            idx += 1
+
+        if idx < len(pending) and pending[idx] == row_num:
+            close_tag = f'</{prefix}row>'
+            if match.group(3):
+                inner, row_end = '', match.end()
+            else:
+                close = body.index(close_tag, match.end())
+                inner, row_end = body[match.end():close], close + len(close_tag)
+
+            # spans is only an optimisation hint and may no longer be accurate
+            out.append(body[pos:match.start()])
+            out.append(f'<{prefix}row{_drop_attr(attrs, "spans")}>')
+            out.append(_patch_row_cells(inner, by_row[row_num], cell_xml))
+            out.append(close_tag)
+            pos = row_end
+            idx += 1
+
+    out.append(body[pos:])
+    for row_num in pending[idx:]:
+        out.append(_new_row_xml(prefix, row_num, by_row[row_num], cell_xml))
+    return ''.join(out)
+
+def _expand_dimension(sheet_xml, rows, cols):
+    match = _DIMENSION.search(sheet_xml)
+    if not match:
+        return sheet_xml
+
+    bounds = [split_cell_ref(ref) for ref in match.group(2).split(':') if ref]
+    all_rows = [r for r, _ in bounds] + list(rows)
+    all_cols = [c for _, c in bounds] + list(cols)
+    start = f'{column_letter(min(all_cols))}{min(all_rows)}'
+    end = f'{column_letter(max(all_cols))}{max(all_rows)}'
+    ref = start if start == end else f'{start}:{end}'
+    return sheet_xml[:match.start(2)] + ref + sheet_xml[match.end(2):]
+
+def _sheet_data_bounds(sheet_xml):
+    """
+    Locate the <sheetData> body, expanding a self-closed <sheetData/>
+
+    Returns:
+        tuple: (sheet_xml, prefix, body_start, body_end)
+    """
+    match = _SHEET_DATA.search(sheet_xml)
+    if not match:
+        raise XlsxPatchError("Worksheet has no <sheetData>")
+    prefix = match.group(1)
+
+    if match.group(2):
+        open_tag = f'<{prefix}sheetData>'
+        sheet_xml = sheet_xml[:match.start()] + open_tag + f'</{prefix}sheetData>' + sheet_xml[match.end():]
+        body_start = match.start() + len(open_tag)
+        return sheet_xml, prefix, body_start, body_start
+
+    body_start = match.end()
+    return sheet_xml, prefix, body_start, sheet_xml.index(f'</{prefix}sheetData>', body_start)
+
+def _last_cell_row(body, prefix):
+    """
+    Find the last row holding any cell, scanning backwards from the end
+
+    Styled blank cells count, matching openpyxl's max_row, so appends land
+    below pre-formatted blank rows rather than inside them.
+
+    Returns:
+        tuple: (row_number, offset of its <row> tag), (0, 0) if none
+    """
+    close_tag = f'</{prefix}row>'
+    end = len(body)
+    while True:
+        start = body.rfind(f'<{prefix}row', 0, end)
+        if start == -1:
+            return 0, 0
+        match = _ROW_OPEN.match(body, start)
+        if match and not match.group(3):
+            close = body.find(close_tag, match.end())
+            if re.search(r'<(?:\w+:|)c\b', body[match.end():close]):
+                row_attr = _get_attr(match.group(2), 'r')
+                if row_attr is None:
+                    raise XlsxPatchError("Rows without explicit numbers are not supported")
+                return int(row_attr), start
+        end = start
+
+def patch_sheet_xml(sheet_xml, updates, date1904=False, styles=None, append_rows=None,
+                    shared_strings=None):
+    """
+    Apply cell updates to one worksheet's XML text
+
+    Args:
+        sheet_xml: Worksheet XML (str)
+        updates: dict {cell_ref: value}
+        date1904: Workbook uses the 1904 date system
+        styles: CellStyles giving date cells a date number format
+        append_rows: Rows (lists of values) to add below the last row with
+            cells (styled blanks included, as openpyxl's max_row)
+        shared_strings: SharedStrings table for text cells (inline if None)
+
+    Returns:
+        str: Patched worksheet XML
+    """
+    sheet_xml, prefix, body_start, body_end = _sheet_data_bounds(sheet_xml)
+    body = sheet_xml[body_start:body_end]
+
+    def cell_xml(ref, value, style=None):
+        if styles is not None:
+            style = styles.date_style(style, value)
+        return build_cell_xml(prefix, ref, value, style=style, date1904=date1904,
+                              shared_strings=shared_strings)
+
+    by_row = defaultdict(dict)
+    for cell, value in updates.items():
+        row, col = split_cell_ref(cell)
+        by_row[row][col] = (f'{column_letter(col)}{row}', value)
+
+    # Appends never touch rows above the last row, so skip scanning them
+    scan_from = 0
+    if append_rows is not None:
+        last_row, offset = _last_cell_row(body, prefix)
+        scan_from = offset if not by_row else 0
+        for row, values in enumerate(append_rows, last_row + 1):
+            for col, value in enumerate(values, 1):
+                if value is not None:
+                    by_row[row][col] = (f'{column_letter(col)}{row}', value)
+
+    if not by_row:
+        return sheet_xml
+
+    body = _patch_sheet_data(body, prefix, by_row, cell_xml, scan_from)
+    sheet_xml = sheet_xml[:body_start] + body + sheet_xml[body_end:]
+
+    cols = {col for row_updates in by_row.values() for col in row_updates}
+    return _expand_dimension(sheet_xml, by_row.keys(), cols)
+
+def _rewrite_package(src, dst, edits):
+    """
+    Copy an xlsx package, patching the sheets named in edits
+
+    Args:
+        edits: {sheet_name: {'updates': {cell: value}, 'append_rows': [...]}}
+    """
+    with zipfile.ZipFile(src, 'r') as zin:
+        sheet_parts = get_sheet_parts(zin)
+        missing = [name for name in edits if name not in sheet_parts]
+        if missing:
+            raise ValueError(
+                f"Sheet '{missing[0]}' not found. Available: {list(sheet_parts)}"
+            )
+
+        workbook_xml = zin.read(WORKBOOK_PART).decode('utf-8')
+        patched = {WORKBOOK_PART: _force_full_calc(workbook_xml).encode('utf-8')}
+
+        # Date cells need a date number format so they don't show as serials
+        values = (
+            v
+            for edit in edits.values()
+            for v in chain(edit.get('updates', {}).values(), chain.from_iterable(edit.get('append_rows') or ()))
+        )
+        styles = None
+        if any(_date_format_id(v) is not None for v in values) and STYLES_PART in zin.namelist():
+            styles = CellStyles(zin.read(STYLES_PART).decode('utf-8'))
+
+        # Text goes through the shared strings table when the package has one
+        shared_strings = None
+        if SHARED_STRINGS_PART in zin.namelist():
+            shared_strings = SharedStrings(zin.read(SHARED_STRINGS_PART).decode('utf-8'))
+
+        date1904 = _uses_1904_dates(workbook_xml)
+        for name, edit in edits.items():
+            part = sheet_parts[name]
+            patched[part] = patch_sheet_xml(
+                zin.read(part).decode('utf-8'),
+                edit.get('updates', {}),
+                date1904=date1904,
+                styles=styles,
+                append_rows=edit.get('append_rows'),
+                shared_strings=shared_strings
+            ).encode('utf-8')
+
+        if styles is not None and styles.changed:
+            patched[STYLES_PART] = styles.render().encode('utf-8')
+        if shared_strings is not None and shared_strings.changed:
+            patched[SHARED_STRINGS_PART] = shared_strings.render().encode('utf-8')
+
+        with zipfile.ZipFile(dst, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if info.filename == 'xl/calcChain.xml':
+                    continue
+                if info.filename in patched:
+                    data = patched[info.filename]
+                elif info.filename in (CONTENT_TYPES_PART, WORKBOOK_RELS_PART):
+                    data = _drop_calc_chain(info.filename, zin.read(info))
+                else:
+                    data = zin.read(info)
+                zout.writestr(info, data)
+
+def patch_cells(src, dst, updates):
+    """
+    Write cell values into an xlsx package, rewriting only the affected sheets
+
+    Every other part is copied unchanged. calcChain is dropped and a full
+    recalculation is requested, as openpyxl does on save.
+
+    Args:
+        src: Source path or binary file-like object
+        dst: Destination path or writable binary file-like object
+        updates: Iterable of (sheet_name, cell_ref, value)
+
+    Raises:
+        ValueError: Unknown sheet name or bad cell reference
+        XlsxPatchError: Layout not supported by in-place patching
+    """
+    edits = defaultdict(lambda: {'updates': {}})
+    for sheet_name, cell, value in updates:
+        edits[sheet_name]['updates'][cell] = value
+    _rewrite_package(src, dst, edits)
+
+def append_rows(src, dst, sheet_name, rows):
+    """
+    Add rows below the last row of a sheet that has cells
+
+    As with openpyxl's max_row, rows of styled blank cells count, so new
+    rows go below pre-formatted blank rows.
+
+    Existing rows are not parsed; only the tail of <sheetData> is touched.
+
+    Args:
+        src: Source path or binary file-like object
+        dst: Destination path or writable binary file-like object
+        sheet_name: Target sheet
+        rows: Iterable of row value lists (column A first, None = blank)
+    """
+    _rewrite_package(src, dst, {sheet_name: {'append_rows': [list(r) for r in rows]}})
+
+def read_header(src, sheet_name):
+    """
+    Read the first non-empty row of a sheet without parsing the rest
+
+    Args:
+        src: Path or binary file-like object of the xlsx
+        sheet_name: Sheet to read
+
+    Returns:
+        list: Cell values by column position (None for gaps)
+    """
+    with zipfile.ZipFile(src, 'r') as zin:
+        sheet_parts = get_sheet_parts(zin)
+        if sheet_name not in sheet_parts:
+            raise ValueError(f"Sheet '{sheet_name}' not found. Available: {list(sheet_parts)}")
+
+        row_xml = None
+        head = b''
+        with zin.open(sheet_parts[sheet_name]) as stream:
+            while row_xml is None:
+                chunk = stream.read(16384)
+                if not chunk:
+                    return []
+                head += chunk
+                for match in _ROW_BYTES.finditer(head):
+                    if re.search(rb'<(?:\w+:|)(?:v|is)\b', match.group(1)):
+                        row_xml = match.group(1).decode('utf-8')
+                        break
+
+        cells = []
+        for match in _CELL.finditer(row_xml):
+            attrs, content = match.group(2), match.group(3) or ''
+            col = split_cell_ref(_get_attr(attrs, 'r'))[1]
+            cells.append((col, _get_attr(attrs, 't'), content))
+
+        shared = {}
+        wanted = {int(_inner_text(content, 'v')) for _, kind, content in cells if kind == 's'}
+        if wanted and SHARED_STRINGS_PART in zin.namelist():
+            shared = _read_shared_strings(zin, wanted)
+
+        header = [None] * (max((col for col, _, _ in cells), default=0))
+        for col, kind, content in cells:
+            if kind == 's':
+                value = shared.get(int(_inner_text(content, 'v')))
+            elif kind == 'inlineStr':
+                value = ''.join(unescape(t) for t in _T_TEXT.findall(content))
+            elif kind in ('str', 'e'):
+                value = unescape(_inner_text(content, 'v') or '')
+            elif kind == 'b':
+                value = _inner_text(content, 'v') == '1'
+            else:
+                text = _inner_text(content, 'v')
+                value = None if text is None else float(text)
+                if value is not None and value.is_integer():
+                    value = int(value)
+            header[col - 1] = value
+        return header
+
+def _inner_text(content, tag):
+    match = re.search(r'<(?:\w+:|)' + tag + r'\b[^>]*>(.*?)</', content, re.S)
+    return match.group(1) if match else None
+
+def _read_shared_strings(zin, wanted):
+    """Resolve the given sharedStrings indexes, stopping after the last one"""
+    last = max(wanted)
+    found = {}
+    index = 0
+    with zin.open(SHARED_STRINGS_PART) as stream:
+        for _, elem in ET.iterparse(stream, events=('end',)):
+            if elem.tag != f'{{{NS_MAIN}}}si':
+                continue
+            if index in wanted:
+                # Plain <t> or rich-text runs <r><t>; skip phonetic <rPh>
+                parts = [t.text or '' for t in elem.findall(f'{{{NS_MAIN}}}t')]
+                parts += [t.text or '' for t in elem.findall(f'{{{NS_MAIN}}}r/{{{NS_MAIN}}}t')]
+                found[index] = ''.join(parts)
+            elem.clear()
+            if index == last:
+                break
+            index += 1
+    return found